@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
 from pandas import DataFrame
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -14,40 +15,272 @@ Here we are using Template design pattern to create the templates for Missing Va
 class MissingValueAnalysisTemplate(ABC):
 
     @abstractmethod
-    def identify_missing_values(self, dataframe :DataFrame):
+    def identify_missing_values(self, dataframe :DataFrame, mask=None):
         """
         This method should print the count of missing values for each column.
         """
         pass
 
     @abstractmethod
-    def visualize_missing_values(self, dataframe :DataFrame):
+    def visualize_missing_values(self, dataframe :DataFrame, mask=None):
         """
         Visualizes missing values in the dataframe. THis method will create a visualization
         """
         pass
 
 
-    def analyze(self, dataframe :DataFrame) -> None:
+    def analyze(self, dataframe :DataFrame, mask=None) -> None:
         """
         Performs a complete missing values analysis by identifying and visualizing missing values.
+        `mask` is the MissingnessMask artifact of the ingestion stage for this frame, when there is
+        one the missing cells are read from its bits instead of an isnull scan.
         """
-        self.identify_missing_values(dataframe)
-        self.visualize_missing_values(dataframe)
+        check_mask(dataframe, mask)
+        self.identify_missing_values(dataframe, mask)
+        self.visualize_missing_values(dataframe, mask)
+
+
+
+def check_mask(dataframe :DataFrame, mask) -> None:
+    # a mask built for another frame would report the wrong cells
+    if mask is not None and (mask.n_rows != len(dataframe) or mask.columns != list(dataframe.columns)):
+        raise ValueError("The missingness mask was not built for this dataframe.")
+
+
+
+# This class counts the distinct missingness patterns of the rows, chunk by chunk, and finds the columns that go missing together.
+class MissingValuePatternProfiler:
+    def __init__(self, chunk_size :int = 1_000_000):
+        """
+        Every row's missingness is packed into a bit pattern (one bit per column) and hashed to a
+        64 bit key, the keys of a chunk are counted in one vectorized np.unique. Only the distinct
+        patterns and their counts are kept, so the profile of hundreds of millions of rows costs a
+        chunk of packed rows plus one entry per distinct pattern, and profiles of separate chunks
+        (e.g. from worker processes) can be merged.
+
+        Up to 64 columns the key is the pattern itself. Wider frames hash the pattern's 64 bit
+        words together, two distinct patterns then collide with a probability of about 2^-64.
+
+        Parameters:
+        chunk_size (int): Number of rows packed at once, it caps the memory of a single update.
+        """
+        self.chunk_size = chunk_size
+        self.columns = None
+        self.n_rows = 0
+        self._counts = {}
+        self._patterns = {}
+
+    def update(self, dataframe :DataFrame, mask=None) -> "MissingValuePatternProfiler":
+        """
+        Adds the rows of the frame (or of one chunk of a larger dataset) to the profile. With the
+        frame's MissingnessMask the rows are packed from its bits instead of an isna scan.
+        """
+        if self.columns is None:
+            self.columns = list(dataframe.columns)
+        elif list(dataframe.columns) != self.columns:
+            raise ValueError("Every chunk of a missing value profile must have the same columns.")
+        check_mask(dataframe, mask)
+
+        # chunks start on a byte boundary, so they line up with the mask bytes
+        chunk_size = max(8, self.chunk_size - self.chunk_size % 8)
+        for start in range(0, len(dataframe), chunk_size):
+            stop = min(start + chunk_size, len(dataframe))
+            if mask is not None:
+                missing = (
+                    np.unpackbits(bits[start // 8:(stop + 7) // 8], count=stop - start).astype(bool)
+                    for bits in mask.bits
+                )
+            else:
+                missing = (series.isna().to_numpy() for _, series in dataframe.iloc[start:stop].items())
+            self._count(self._pack(missing, stop - start))
+            self.n_rows += stop - start
+        return self
+
+    def _pack(self, missing, n_rows :int) -> np.ndarray:
+        # Row-major bits, built one column at a time so no boolean frame is allocated.
+        n_words = max(1, (len(self.columns) + 63) // 64)
+        packed = np.zeros((n_rows, n_words * 8), dtype=np.uint8)
+        for position, column_missing in enumerate(missing):
+            packed[:, position // 8] |= column_missing.astype(np.uint8) << np.uint8(7 - position % 8)
+        return packed
+
+    @staticmethod
+    def _hash(packed :np.ndarray) -> np.ndarray:
+        words = packed.view(np.uint64)
+        if words.shape[1] == 1:
+            return words[:, 0].copy()
+
+        keys = np.zeros(len(words), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for position in range(words.shape[1]):
+                keys = (keys ^ words[:, position]) * np.uint64(0x9E3779B97F4A7C15)
+                keys ^= keys >> np.uint64(29)
+        return keys
+
+    def _count(self, packed :np.ndarray) -> None:
+        keys, first_rows, counts = np.unique(self._hash(packed), return_index=True, return_counts=True)
+        for key, row, count in zip(keys.tolist(), first_rows.tolist(), counts.tolist()):
+            if key not in self._counts:
+                self._counts[key] = 0
+                self._patterns[key] = packed[row].tobytes()
+            self._counts[key] += count
+
+    def merge(self, other :"MissingValuePatternProfiler") -> "MissingValuePatternProfiler":
+        """
+        Adds the patterns counted by another profiler, e.g. one that profiled a different chunk.
+        """
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns = list(other.columns)
+        elif other.columns != self.columns:
+            raise ValueError("Only profiles of the same columns can be merged.")
+
+        for key, count in other._counts.items():
+            if key not in self._counts:
+                self._counts[key] = 0
+                self._patterns[key] = other._patterns[key]
+            self._counts[key] += count
+        self.n_rows += other.n_rows
+        return self
+
+    @property
+    def n_patterns(self) -> int:
+        return len(self._counts)
+
+    def _pattern_matrix(self, keys :list) -> np.ndarray:
+        packed = np.frombuffer(b"".join(self._patterns[key] for key in keys), dtype=np.uint8).reshape(len(keys), -1)
+        return np.unpackbits(packed, axis=1, count=len(self.columns)).astype(bool)
+
+    def top_patterns(self, k :int = 10) -> DataFrame:
+        """
+        The k most frequent missingness patterns, with the columns missing in them and their frequency.
+        """
+        keys = sorted(self._counts, key=self._counts.get, reverse=True)[:k]
+        if not keys:
+            return DataFrame(columns=["missing_columns", "n_missing", "count", "frequency"])
+
+        patterns = self._pattern_matrix(keys)
+        columns = np.array(self.columns, dtype=object)
+        counts = np.array([self._counts[key] for key in keys])
+        return DataFrame({
+            "missing_columns": [tuple(columns[pattern]) for pattern in patterns],
+            "n_missing": patterns.sum(axis=1),
+            "count": counts,
+            "frequency": counts / self.n_rows,
+        })
+
+    def column_clusters(self, min_jaccard :float = 0.5) -> list:
+        """
+        Groups of columns that tend to be missing on the same rows, e.g. the garage columns.
+
+        The co-missing counts of every column pair are computed from the distinct patterns instead
+        of the rows, two columns are linked when the Jaccard index of their missing rows is at
+        least `min_jaccard` and the clusters are the connected components (union-find) of the links.
+
+        Returns:
+        list: Lists of column names, the largest cluster first. Columns linked to no other column are left out.
+        """
+        if not self._counts:
+            return []
+
+        keys = list(self._counts)
+        patterns = self._pattern_matrix(keys).astype(np.float64)
+        counts = np.array([self._counts[key] for key in keys], dtype=np.float64)
+        co_missing = (patterns * counts[:, None]).T @ patterns
+        missing = np.diag(co_missing)
+        union = missing[:, None] + missing[None, :] - co_missing
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jaccard = np.where(union > 0, co_missing / union, 0.0)
+
+        parents = list(range(len(self.columns)))
+
+        def find(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        for left, right in zip(*np.nonzero(np.triu(jaccard >= min_jaccard, k=1))):
+            parents[find(left)] = find(right)
+
+        clusters = {}
+        for position in np.flatnonzero(missing):
+            clusters.setdefault(find(position), []).append(self.columns[position])
+        return sorted((cluster for cluster in clusters.values() if len(cluster) > 1), key=len, reverse=True)
 
 
 
 # This class implements methods to identify and visualize missing values in the dataframe.
 class MissingValueAnalysis(MissingValueAnalysisTemplate):
-    def identify_missing_values(self, dataframe: DataFrame) -> None:
+    def __init__(self, max_heatmap_rows :int = 5_000):
+        """
+        Parameters:
+        max_heatmap_rows (int): Frames with more rows get the pattern view of MissingValuePatternAnalysis
+                                instead of a heatmap with one line per row.
+        """
+        self.max_heatmap_rows = max_heatmap_rows
+
+    def identify_missing_values(self, dataframe: DataFrame, mask=None) -> None:
         print("\n Missing Values Count by Column:")
-        missing_values = dataframe.isnull().sum()
+        # the mask counts its set bits, no boolean frame is built
+        missing_values = mask.counts() if mask is not None else dataframe.isnull().sum()
         print(missing_values[missing_values > 0])
 
 
-    def visualize_missing_values(self, dataframe: DataFrame) -> None:
+    def visualize_missing_values(self, dataframe: DataFrame, mask=None) -> None:
+        if len(dataframe) > self.max_heatmap_rows:
+            MissingValuePatternAnalysis().visualize_missing_values(dataframe, mask)
+            return
+
         print("\nVisualizing Missing Values...")
         plt.figure(figsize=(12, 8))
-        sns.heatmap(dataframe.isnull(), cbar=False, cmap="viridis")
+        missing = mask.to_frame(dataframe.index) if mask is not None else dataframe.isnull()
+        sns.heatmap(missing, cbar=False, cmap="viridis")
         plt.title("Missing Values Heatmap")
         plt.show()
+
+
+
+# This class reports the most frequent missingness patterns and the co-missing column clusters, at any number of rows.
+class MissingValuePatternAnalysis(MissingValueAnalysisTemplate):
+    def __init__(self, top_k :int = 10, min_jaccard :float = 0.5, chunk_size :int = 1_000_000):
+        """
+        Parameters:
+        top_k (int): Number of patterns reported and plotted.
+        min_jaccard (float): Jaccard index of their missing rows above which two columns are clustered.
+        chunk_size (int): Number of rows the profiler packs at once.
+        """
+        self.top_k = top_k
+        self.min_jaccard = min_jaccard
+        self.chunk_size = chunk_size
+
+    def profile(self, dataframe :DataFrame, mask=None) -> MissingValuePatternProfiler:
+        return MissingValuePatternProfiler(chunk_size=self.chunk_size).update(dataframe, mask)
+
+    def identify_missing_values(self, dataframe :DataFrame, mask=None) -> None:
+        profiler = self.profile(dataframe, mask)
+        print(f"\n{profiler.n_patterns} distinct missing value patterns over {profiler.n_rows} rows, the most frequent:")
+        print(profiler.top_patterns(self.top_k).to_string())
+
+        print("\nColumns missing together:")
+        for cluster in profiler.column_clusters(self.min_jaccard):
+            print(cluster)
+
+
+    def visualize_missing_values(self, dataframe :DataFrame, mask=None) -> None:
+        print("\nVisualizing Missing Value Patterns...")
+        top_patterns = self.profile(dataframe, mask).top_patterns(self.top_k)
+        columns = sorted({column for pattern in top_patterns["missing_columns"] for column in pattern}, key=dataframe.columns.get_loc)
+
+        # one line per pattern instead of one per row
+        patterns = DataFrame(
+            [[column in pattern for column in columns] for pattern in top_patterns["missing_columns"]],
+            columns=columns,
+            index=[f"{frequency:.1%}" for frequency in top_patterns["frequency"]],
+        )
+        plt.figure(figsize=(12, 8))
+        sns.heatmap(patterns, cbar=False, cmap="viridis")
+        plt.ylabel("Share of rows")
+        plt.title(f"Top {len(patterns)} Missing Value Patterns")
+        plt.show()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import pandas as pd
+
+from benchmarks.benchmark_strategies import REFERENCE_DATASET, scaled_dataset
+from src.Components.data_splitter import SimpleTrainTestSplitStrategy
+from src.Components.feature_engineering import OneHotEncoding
+from src.Components.handling_missing_values import FillMissingValuesStrategy
+from src.Components.model_building import LinearRegressionStrategy
+from src.instrumentation import _RssSampler
+
+"""
+Memory of one-hot encoding every Ames categorical and fitting the linear regression on the
+result, with dense encoded columns against sparse ones that reach the model as CSR. Every mode
+runs in a fresh worker process.
+
+    python -m benchmarks.benchmark_onehot_memory --scale 100
+"""
+
+
+def traced(func):
+    start = time.perf_counter()
+    tracemalloc.start()
+    try:
+        result = func()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak_bytes, time.perf_counter() - start
+
+
+def run_encoding(data_path :str, sparse :bool) -> dict:
+    df = FillMissingValuesStrategy("mean").handle(pd.read_csv(data_path))
+    categorical = list(df.select_dtypes(include="object").columns)
+
+    sampler = _RssSampler()
+    sampler.start()
+    try:
+        encoding = OneHotEncoding(categorical, copy=False, sparse=sparse)
+        encoded, encode_bytes, encode_seconds = traced(lambda: encoding.apply_transformation(df))
+        del df
+        X_train, _, y_train, _ = SimpleTrainTestSplitStrategy().split_data(encoded, "SalePrice")
+        _, fit_bytes, fit_seconds = traced(lambda: LinearRegressionStrategy().build_and_train_model(X_train, y_train))
+    finally:
+        peak_bytes = sampler.stop()
+
+    encoded_columns = list(encoding.encoder.get_feature_names_out(categorical))
+    return {
+        "columns": len(encoded_columns),
+        "encoded_bytes": int(encoded[encoded_columns].memory_usage(index=False).sum()),
+        "encode_bytes": encode_bytes,
+        "encode_seconds": encode_seconds,
+        "fit_bytes": fit_bytes,
+        "fit_seconds": fit_seconds,
+        "peak_bytes": peak_bytes,
+    }
+
+
+@click.command()
+@click.option("--scale", default=100, show_default=True, help="Multiple of the Ames row count.")
+def main(scale):
+    """Benchmark the memory of dense against sparse one-hot encoding up to model fitting."""
+
+    df = scaled_dataset(pd.read_csv(REFERENCE_DATASET), scale)
+    click.echo(f"Frame with {len(df)} rows and {len(df.columns)} columns")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "data.csv")
+        df.to_csv(data_path, index=False)
+        del df
+
+        results = {}
+        for sparse in (False, True):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[sparse] = executor.submit(run_encoding, data_path, sparse).result()
+
+    for sparse, label in ((False, "dense"), (True, "sparse")):
+        result = results[sparse]
+        click.echo(
+            f"{label:<7}: {result['columns']} encoded columns of {result['encoded_bytes'] / 1024 ** 2:8.1f} MB, "
+            f"encode {result['encode_seconds']:6.2f}s traced {result['encode_bytes'] / 1024 ** 2:8.1f} MB, "
+            f"fit {result['fit_seconds']:6.2f}s traced {result['fit_bytes'] / 1024 ** 2:8.1f} MB, "
+            f"peak RSS {result['peak_bytes'] / 1024 ** 2:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import pandas as pd
+
+from benchmarks.benchmark_strategies import REFERENCE_DATASET, scaled_dataset
+from src.Components.data_splitter import SimpleTrainTestSplitStrategy
+from src.Components.feature_engineering import FeatureEngineer, LogTransformation
+from src.Components.handling_missing_values import FillMissingValuesStrategy, MissingValueHandler
+from src.Components.model_building import LinearRegressionStrategy
+from src.instrumentation import _RssSampler, _current_rss_bytes
+
+"""
+Peak RSS of the training chain (mean imputation, log transformation, split, linear regression)
+with and without the in-place mode of the strategies. Every mode runs in a fresh worker process,
+so one run's freed memory never hides the other's peak. Memory freed while parsing the csv is
+often reused by the allocator without growing the RSS, so the peak allocated by the chain as
+traced by tracemalloc is reported as well.
+
+    python -m benchmarks.benchmark_pipeline_memory --scale 20
+"""
+
+
+def run_chain(data_path :str, inplace :bool) -> dict:
+    df = pd.read_csv(data_path)
+    loaded_bytes = _current_rss_bytes()
+
+    sampler = _RssSampler()
+    sampler.start()
+    tracemalloc.start()
+    try:
+        df = MissingValueHandler(FillMissingValuesStrategy("mean", copy=not inplace)).handle_missing_values(df)
+        df = FeatureEngineer(
+            LogTransformation(["Gr Liv Area", "SalePrice"], copy=not inplace)
+        ).apply_feature_engineering(df)
+        X_train, _, y_train, _ = SimpleTrainTestSplitStrategy().split_data(
+            df.select_dtypes(include="number"), "SalePrice"
+        )
+        LinearRegressionStrategy().build_and_train_model(X_train, y_train)
+    finally:
+        traced_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        peak_bytes = sampler.stop()
+
+    return {"loaded_bytes": loaded_bytes, "peak_bytes": peak_bytes, "traced_bytes": traced_bytes}
+
+
+@click.command()
+@click.option("--scale", default=20, show_default=True, help="Multiple of the Ames row count.")
+def main(scale):
+    """Benchmark the peak memory of the training chain with and without in-place strategies."""
+
+    df = scaled_dataset(pd.read_csv(REFERENCE_DATASET), scale)
+    click.echo(f"Frame with {len(df)} rows and {len(df.columns)} columns")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "data.csv")
+        df.to_csv(data_path, index=False)
+        del df
+
+        results = {}
+        for inplace in (False, True):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[inplace] = executor.submit(run_chain, data_path, inplace).result()
+
+    for inplace, label in ((False, "copying"), (True, "in-place")):
+        result = results[inplace]
+        click.echo(
+            f"{label:<9}: loaded {result['loaded_bytes'] / 1024 ** 2:8.1f} MB, "
+            f"peak {result['peak_bytes'] / 1024 ** 2:8.1f} MB, "
+            f"chain overhead {(result['peak_bytes'] - result['loaded_bytes']) / 1024 ** 2:8.1f} MB, "
+            f"traced {result['traced_bytes'] / 1024 ** 2:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
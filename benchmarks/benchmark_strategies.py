@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import click
+import pandas as pd
+
+from src.Components.data_splitter import SimpleTrainTestSplitStrategy
+from src.Components.feature_engineering import LogTransformation, MinMaxScaling, OneHotEncoding, StandardScaling
+from src.Components.handling_missing_values import (
+    DropMissingValuesStrategy,
+    FillMissingValuesStrategy,
+    GroupedFillMissingValuesStrategy,
+    IterativeImputeStrategy,
+    KNNImputeStrategy,
+)
+from src.Components.model_building import LinearRegressionStrategy
+from src.Components.synthetic_data import SyntheticDataGenerator
+
+"""
+Benchmark harness for the strategy classes.
+
+Every strategy runs on synthetic data at multiples of the Ames size (2,930 rows), the best wall
+time and the peak traced memory are written to a results file and compared with a stored baseline.
+
+    python -m benchmarks.benchmark_strategies --scales 1 10 100 --baseline benchmarks/baseline.json
+"""
+
+REFERENCE_DATASET = os.path.join("artifacts", "dataset", "AmesHousing.csv")
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+NUMERIC_FEATURES = ["Gr Liv Area", "Lot Area", "Overall Qual", "Year Built", "Total Bsmt SF"]
+CATEGORICAL_FEATURES = ["Neighborhood", "MS Zoning"]
+TARGET = "SalePrice"
+
+
+def _model_inputs(df :pd.DataFrame) -> tuple:
+    data = df[NUMERIC_FEATURES + [TARGET]].fillna(0)
+    return data[NUMERIC_FEATURES], data[TARGET]
+
+
+# Each case maps a name to a function building the call to benchmark from the data, so the
+# preparation of inputs is never part of the measurement.
+BENCHMARK_CASES = {
+    "DropMissingValuesStrategy": lambda df: lambda: DropMissingValuesStrategy(axis=0, thresh=5).handle(df),
+    "FillMissingValuesStrategy[mean]": lambda df: lambda: FillMissingValuesStrategy("mean").handle(df),
+    "FillMissingValuesStrategy[median]": lambda df: lambda: FillMissingValuesStrategy("median").handle(df),
+    "FillMissingValuesStrategy[mode]": lambda df: lambda: FillMissingValuesStrategy("mode").handle(df),
+    "FillMissingValuesStrategy[constant]": lambda df: lambda: FillMissingValuesStrategy("constant", 0).handle(df),
+    "GroupedFillMissingValuesStrategy[median]": lambda df: lambda: GroupedFillMissingValuesStrategy(
+        ["Neighborhood"], "median"
+    ).handle(df),
+    "KNNImputeStrategy": lambda df: lambda: KNNImputeStrategy().handle(df),
+    "IterativeImputeStrategy": lambda df: lambda: IterativeImputeStrategy().handle(df),
+    "LogTransformation": lambda df: lambda: LogTransformation(["Gr Liv Area", TARGET]).apply_transformation(df),
+    "StandardScaling": lambda df: lambda: StandardScaling(NUMERIC_FEATURES).apply_transformation(df),
+    "MinMaxScaling": lambda df: lambda: MinMaxScaling(NUMERIC_FEATURES).apply_transformation(df),
+    "OneHotEncoding": lambda df: lambda: OneHotEncoding(CATEGORICAL_FEATURES).apply_transformation(df),
+    "SimpleTrainTestSplitStrategy": lambda df: lambda: SimpleTrainTestSplitStrategy().split_data(df, TARGET),
+    "LinearRegressionStrategy": lambda df: (
+        lambda inputs: lambda: LinearRegressionStrategy().build_and_train_model(*inputs)
+    )(_model_inputs(df)),
+}
+
+
+def measure(func, repeat :int = 3) -> dict:
+    """
+    Runs the function `repeat` times and returns its best wall time and the peak memory
+    traced by tracemalloc during a single run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_bytes": peak_bytes}
+
+
+def scaled_dataset(reference :pd.DataFrame, scale :int, seed :int = 42) -> pd.DataFrame:
+    if scale == 1:
+        return reference
+    generator = SyntheticDataGenerator().fit(reference)
+    return pd.concat(generator.generate_chunks(len(reference) * scale, seed=seed), ignore_index=True)
+
+
+def run_benchmarks(scales :list, cases :list = None, repeat :int = 3) -> list:
+    reference = pd.read_csv(REFERENCE_DATASET)
+    cases = cases or list(BENCHMARK_CASES)
+    results = []
+
+    for scale in scales:
+        df = scaled_dataset(reference, scale)
+        for case in cases:
+            result = {"case": case, "scale": scale, "rows": len(df), **measure(BENCHMARK_CASES[case](df), repeat)}
+            click.echo(
+                f"{case:<40} x{scale:<5} {result['seconds']:>10.4f}s {result['peak_bytes'] / 1024 ** 2:>10.1f} MB"
+            )
+            results.append(result)
+
+    return results
+
+
+def compare_to_baseline(results :list, baseline :list, threshold :float) -> list:
+    """
+    Returns the results whose time or peak memory grew by more than `threshold` (0.2 = 20%)
+    over the baseline entry with the same case and scale.
+    """
+    baseline_entries = {(entry["case"], entry["scale"]): entry for entry in baseline}
+    regressions = []
+
+    for result in results:
+        entry = baseline_entries.get((result["case"], result["scale"]))
+        if entry is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if entry[metric] and result[metric] > entry[metric] * (1 + threshold):
+                regressions.append({
+                    "case": result["case"],
+                    "scale": result["scale"],
+                    "metric": metric,
+                    "baseline": entry[metric],
+                    "current": result[metric],
+                    "ratio": result[metric] / entry[metric],
+                })
+
+    return regressions
+
+
+@click.command()
+@click.option("--scales", "-s", multiple=True, type=int, default=[1, 10, 100, 1000], show_default=True,
+              help="Multiples of the Ames row count to benchmark at.")
+@click.option("--case", "cases", multiple=True, type=click.Choice(list(BENCHMARK_CASES)),
+              help="Only run these cases, all of them by default.")
+@click.option("--repeat", default=3, show_default=True, help="Runs per case, the best time is kept.")
+@click.option("--baseline", "baseline_path", default=os.path.join("benchmarks", "baseline.json"), show_default=True)
+@click.option("--threshold", default=0.2, show_default=True, help="Allowed relative regression over the baseline.")
+@click.option("--update-baseline", is_flag=True, help="Store these results as the new baseline.")
+def main(scales, cases, repeat, baseline_path, threshold, update_baseline):
+    """Benchmark every strategy class at scaled data sizes."""
+
+    results = run_benchmarks(list(scales), list(cases), repeat)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.json")
+    with open(results_path, "w") as results_f:
+        json.dump(results, results_f, indent=2)
+    click.echo(f"Results written to {results_path}")
+
+    if update_baseline:
+        with open(baseline_path, "w") as baseline_f:
+            json.dump(results, baseline_f, indent=2)
+        click.echo(f"Baseline updated at {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        click.echo(f"No baseline at {baseline_path}, run with --update-baseline to create one.")
+        return
+
+    with open(baseline_path) as baseline_f:
+        regressions = compare_to_baseline(results, json.load(baseline_f), threshold)
+
+    for regression in regressions:
+        click.echo(
+            f"REGRESSION {regression['case']} x{regression['scale']} {regression['metric']}: "
+            f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)"
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
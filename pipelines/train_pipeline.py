@@ -1,7 +1,7 @@
 
-from stages.data_ingestion_stage import data_ingestion_stage
+from stages.data_ingestion_stage import commit_delta_index_stage, data_ingestion_stage
 from stages.data_splitting_stage import data_splitting_stage
-from stages.feature_engineering_stage import feature_engineering_stage
+from stages.feature_engineering_stage import feature_engineering_stage, target_encoding_stage
 from stages.Handling_missing_values_stages import handle_missing_values_stage
 from stages.model_building_stage import model_building_step
 from zenml import Model, pipeline
@@ -14,16 +14,24 @@ from zenml import Model, pipeline
 )
 
 
-def ml_pipeline():
-    """Define an end-to-end machine learning pipeline."""
+def ml_pipeline(incremental_index :str = None, target_encoding_features :list = None):
+    """Define an end-to-end machine learning pipeline.
 
-    # Data Ingestion Step
-    raw_data = data_ingestion_stage(
-        file_path="S:\\LB_Projects\\Prediction-model\\data\\archive.zip"
+    With an `incremental_index` only the new and changed rows are read, merged into the stored row
+    history the model is trained on, and the index and history record them only after the model was
+    built. The incremental ingestion bypasses the step cache, its output depends on the index. The `target_encoding_features` are target encoded after
+    the split, fitted on the training rows only.
+    """
+
+    # Data Ingestion Step, never replayed from the cache when incremental
+    ingestion_stage = data_ingestion_stage.with_options(enable_cache=False) if incremental_index else data_ingestion_stage
+    raw_data, missingness_mask = ingestion_stage(
+        file_path="S:\\LB_Projects\\Prediction-model\\data\\archive.zip",
+        incremental_index=incremental_index,
     )
 
     # Handling Missing Values Step
-    filled_data = handle_missing_values_stage(raw_data)
+    filled_data = handle_missing_values_stage(raw_data, missingness_mask=missingness_mask)
 
     # Feature Engineering Step
     engineered_data = feature_engineering_stage(
@@ -34,9 +42,17 @@ def ml_pipeline():
     # Data Splitting Step
     X_train, X_test, y_train, y_test = data_splitting_stage(engineered_data, target_column="SalePrice")
 
+    # Target Encoding Step, after the split so the test targets never reach training
+    if target_encoding_features:
+        X_train, X_test = target_encoding_stage(X_train, X_test, y_train, features=target_encoding_features)
+
     # Model Building Step
     model = model_building_step(X_train=X_train, y_train=y_train)
 
+    # Delta Index Commit Step, only once the model was built
+    if incremental_index:
+        commit_delta_index_stage(incremental_index, after="model_building_step")
+
 
     return model
 
@@ -1,9 +1,19 @@
+import inspect
+import io
 import os
+import sys
+import time
 import zipfile
 from abc import ABC , abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from src.Components.dataset_cache import DatasetCache
+from src.Components.delta_index import DeltaIndex, row_hashes
+from src.Components.dtype_plan import DtypePlan, concat_frames
 from src.exception import CustomException
 from src.logger import logging
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 """
 We are using factory design pattern to perform Data Ingestion using different file types.
@@ -26,20 +36,152 @@ class DataIngestor(ABC):
         pass
 
 
+_ROW_FILTER_OPERATORS = {
+    "==": lambda series, value: series == value,
+    "!=": lambda series, value: series != value,
+    "<": lambda series, value: series < value,
+    "<=": lambda series, value: series <= value,
+    ">": lambda series, value: series > value,
+    ">=": lambda series, value: series >= value,
+    "in": lambda series, value: series.isin(value),
+    "not in": lambda series, value: ~series.isin(value),
+}
+
+
+def _read_columns(columns :list, filters :list) -> list:
+    """
+    Columns a reader has to decode: the projection plus the columns the row filters look at.
+    """
+    if columns is None:
+        return None
+    return list(columns) + [column for column, _, _ in filters or [] if column not in columns]
+
+
+def _apply_row_filters(df :pd.DataFrame, filters :list, columns :list = None) -> pd.DataFrame:
+    """
+    Keeps the rows matching every (column, operator, value) filter, the same format pyarrow takes,
+    and then narrows the frame down to `columns`.
+    """
+    if filters:
+        keep = np.ones(len(df), dtype=bool)
+        for column, operator, value in filters:
+            if operator not in _ROW_FILTER_OPERATORS:
+                raise ValueError(f"Unsupported row filter operator {operator}")
+            keep &= _ROW_FILTER_OPERATORS[operator](df[column], value).to_numpy(dtype=bool)
+        df = df[keep].reset_index(drop=True)
+
+    if columns is not None and list(df.columns) != list(columns):
+        df = df[list(columns)]
+
+    return df
+
+
+# pandas' default na_values, so the pyarrow reader treats exactly the same strings as missing.
+_CSV_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def _read_csv_pyarrow(source, usecols :list = None, dtype :dict = None) -> pd.DataFrame:
+    """
+    Parses a csv with the multithreaded Arrow reader and returns the same column names and
+    dtypes the pandas C parser would.
+    """
+    try:
+        from pyarrow import csv as pa_csv
+    except ImportError as e:
+        raise CustomException(f"The pyarrow csv engine requires pyarrow: {e}", sys)
+
+    convert_options = pa_csv.ConvertOptions(
+        null_values=_CSV_NA_VALUES, strings_can_be_null=True, include_columns=usecols,
+    )
+    table = pa_csv.read_csv(
+        source, read_options=pa_csv.ReadOptions(use_threads=True), convert_options=convert_options
+    )
+    df = table.to_pandas()
+
+    # Columns without a single value come back as object, the C parser reads them as float64.
+    for column, data_type in zip(table.column_names, table.schema.types):
+        if str(data_type) == "null":
+            df[column] = df[column].astype(np.float64)
+
+    if dtype:
+        df = df.astype({column: dtype[column] for column in df.columns if column in dtype})
+    return df
+
+
 # Implementing a class for data ingestion using zip file.
 class ZipDataIngestor(DataIngestor):
 
+    def __init__(self, stream :bool = False, chunk_size :int = 100_000, extract_dir :str = "artifacts/dataset",
+                 cache :DatasetCache = None, dtype_plan :DtypePlan = None, columns :list = None, filters :list = None,
+                 engine :str = "c"):
+        """
+        Parameters:
+        stream (bool): If True, the csv member is parsed straight from the zip stream and nothing is extracted to disk.
+        chunk_size (int): Number of rows parsed per chunk in streaming mode.
+        extract_dir (str): Directory the archive is extracted to when streaming is disabled.
+        cache (DatasetCache): Optional cache of parsed datasets keyed by the archive content.
+        dtype_plan (DtypePlan): Optional plan that reads strings as `category` and downcasts the numeric columns.
+        columns (list): Only these columns are parsed, the others are skipped by the csv parser.
+        filters (list): Row filters as (column, operator, value) tuples, e.g. [("Yr Sold", ">=", 2008)].
+        engine (str): "c" for the pandas C parser or "pyarrow" for the multithreaded Arrow csv reader.
+                      The Arrow reader parses the whole member at once, also in streaming mode.
+        """
+        if engine not in ("c", "pyarrow"):
+            raise ValueError(f"Unsupported csv engine {engine}, choose 'c' or 'pyarrow'.")
+
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.extract_dir = extract_dir
+        self.cache = cache
+        self.dtype_plan = dtype_plan
+        self.columns = columns
+        self.filters = filters
+        self.engine = engine
+
     def ingest(self, file_path :str) -> dict:
 
         if not file_path.endswith('.zip'):
-            raise CustomException("The provided file is not a zip file.")
+            raise CustomException("The provided file is not a zip file.", sys)
+
+        if self.cache is not None:
+            return self._ingest_cached(file_path)
+
+        return self._ingest(file_path)
+
+    def _ingest_cached(self, file_path :str) -> dict:
+
+        with zipfile.ZipFile(file_path, "r") as zip_f:
+            member = zip_f.getinfo(self._find_csv_member(zip_f))
+
+        plan = None if self.dtype_plan is None else self.dtype_plan.fingerprint()
+        variant = repr((plan, self.columns, self.filters))
+        key = self.cache.key(file_path, member, variant=variant)
+        df = self.cache.load(key)
+
+        if df is None:
+            output = self._ingest(file_path)
+            self.cache.store(key, output["dataframe"], source=file_path, variant=variant, filtered=bool(self.filters))
+            return output
+
+        return {
+            "dataframe" : df,
+            "file_path" : self.cache.entry_path(key),
+        }
+
+    def _ingest(self, file_path :str) -> dict:
+
+        if self.stream:
+            return self._ingest_stream(file_path)
 
         with zipfile.ZipFile(file_path, "r") as zip_f:
-            zip_f.extractall("artifacts/dataset")
+            zip_f.extractall(self.extract_dir)
 
         logging.info("Zip file extracted successfully.")
 
-        extracted_files = os.listdir("artifacts/dataset")
+        extracted_files = os.listdir(self.extract_dir)
         csv_data_files = [ file for file in extracted_files if file.endswith(".csv")]
 
         if len(csv_data_files) == 0:
@@ -47,33 +189,590 @@ class ZipDataIngestor(DataIngestor):
         elif len(csv_data_files) > 1:
             raise ValueError("There are more than one csv file. Please choose one.")
 
-        csv_file_path = os.path.join("artifacts/dataset", csv_data_files[0])
-        df = pd.read_csv(csv_file_path)
+        csv_file_path = os.path.join(self.extract_dir, csv_data_files[0])
+
+        read_kwargs = self._read_kwargs(lambda: pd.read_csv(csv_file_path, nrows=0).columns)
+        df = _apply_row_filters(self._read_csv(csv_file_path, read_kwargs), self.filters, self.columns)
+
+        if self.dtype_plan is not None:
+            df, memory_report = self.dtype_plan.optimize(df)
+            self._log_memory_report(memory_report)
 
         """
         Returning the DataFrame successfully
         """
         # logging.info("Returning the DataFrame successfully")
 
-        return {
+        output = {
             "dataframe" : df,
             "file_path" : csv_file_path,
         }
+        if self.dtype_plan is not None:
+            output["memory_report"] = memory_report
+
+        return output
+
+    def iter_chunks(self, file_path :str):
+        """
+        Yields the csv member of the archive as DataFrames of at most `chunk_size` rows,
+        decompressing the member on the fly without extracting it.
+        """
+        with zipfile.ZipFile(file_path, "r") as zip_f:
+            member = self._find_csv_member(zip_f)
+
+            def read_header():
+                with zip_f.open(member) as csv_stream:
+                    return pd.read_csv(csv_stream, nrows=0).columns
+
+            read_kwargs = self._read_kwargs(read_header)
+            with zip_f.open(member) as csv_stream:
+                if self.engine == "pyarrow":
+                    chunks = [self._read_csv(csv_stream, read_kwargs)]
+                else:
+                    chunks = pd.read_csv(csv_stream, chunksize=self.chunk_size, **read_kwargs)
+
+                for chunk in chunks:
+                    yield _apply_row_filters(chunk, self.filters, self.columns)
+
+    def _read_csv(self, source, read_kwargs :dict) -> pd.DataFrame:
+        if self.engine == "pyarrow":
+            return _read_csv_pyarrow(source, **read_kwargs)
+        return pd.read_csv(source, **read_kwargs)
+
+    def _read_kwargs(self, read_header) -> dict:
+        """
+        Builds the `pd.read_csv` arguments, `read_header` is only called when the dtype plan needs the header.
+        """
+        read_kwargs = {}
+        if self.columns is not None:
+            read_kwargs["usecols"] = _read_columns(self.columns, self.filters)
+        if self.dtype_plan is not None:
+            read_kwargs["dtype"] = self.dtype_plan.read_dtypes(read_header())
+        return read_kwargs
+
+    def _ingest_stream(self, file_path :str) -> dict:
+
+        with zipfile.ZipFile(file_path, "r") as zip_f:
+            member = self._find_csv_member(zip_f)
+
+        logging.info(f"Streaming {member} from {file_path} in chunks of {self.chunk_size} rows.")
+
+        if self.dtype_plan is None:
+            return {
+                "dataframe" : pd.concat(self.iter_chunks(file_path), ignore_index=True),
+                "file_path" : f"{file_path}/{member}",
+            }
+
+        # Downcasting every chunk as it arrives keeps the peak memory at the optimized footprint.
+        chunks, before_bytes = [], 0
+        for chunk in self.iter_chunks(file_path):
+            chunk, chunk_report = self.dtype_plan.optimize(chunk)
+            before_bytes += chunk_report["before_bytes"]
+            chunks.append(chunk)
+
+        df = concat_frames(chunks)
+        memory_report = {
+            "before_bytes": before_bytes,
+            "after_bytes": int(df.memory_usage(index=False, deep=True).sum()),
+        }
+        self._log_memory_report(memory_report)
+
+        return {
+            "dataframe" : df,
+            "file_path" : f"{file_path}/{member}",
+            "memory_report" : memory_report,
+        }
+
+    @staticmethod
+    def _log_memory_report(memory_report :dict) -> None:
+        logging.info(
+            f"DataFrame memory with dtype plan: {memory_report['before_bytes'] / 1024 ** 2:.2f} MB before, "
+            f"{memory_report['after_bytes'] / 1024 ** 2:.2f} MB after."
+        )
+
+    @staticmethod
+    def _find_csv_member(zip_f :zipfile.ZipFile) -> str:
+
+        csv_members = [member for member in zip_f.namelist() if member.endswith(".csv")]
+
+        if len(csv_members) == 0:
+            raise FileNotFoundError("There is no csv file")
+        elif len(csv_members) > 1:
+            raise ValueError("There are more than one csv file. Please choose one.")
+
+        return csv_members[0]
     
 
 
+def _read_csv_shard(source :str, member :str, dtype_plan :DtypePlan, columns :list, filters :list) -> tuple:
+    """
+    Parses a single shard inside a worker process, `member` is None when the shard is a plain file.
+    Returns the shard and its memory report (None without a dtype plan).
+    """
+    def open_shard():
+        if member is None:
+            return open(source, "rb")
+        # The member keeps the archive file open until it is closed itself.
+        with zipfile.ZipFile(source, "r") as zip_f:
+            return zip_f.open(member)
+
+    read_kwargs = {}
+    if columns is not None:
+        read_kwargs["usecols"] = _read_columns(columns, filters)
+    if dtype_plan is not None:
+        with open_shard() as shard:
+            read_kwargs["dtype"] = dtype_plan.read_dtypes(pd.read_csv(shard, nrows=0).columns)
+
+    with open_shard() as shard:
+        df = _apply_row_filters(pd.read_csv(shard, **read_kwargs), filters, columns)
+
+    if dtype_plan is None:
+        return df, None
+    return dtype_plan.optimize(df)
+
+
+def _concat_preallocated(frames :list) -> pd.DataFrame:
+    """
+    Concatenates frames with identical columns by allocating every output column once
+    and copying the shards into it, instead of growing intermediate blocks.
+    """
+    total_rows = sum(len(frame) for frame in frames)
+    columns = {}
+
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            categories = union_categoricals(parts, sort_categories=True).categories
+            codes = np.empty(total_rows, dtype=np.int32)
+            offset = 0
+            for part in parts:
+                codes[offset:offset + len(part)] = part.cat.set_categories(categories).cat.codes
+                offset += len(part)
+            columns[column] = pd.Categorical.from_codes(codes, categories=categories)
+            continue
+
+        dtypes = [part.dtype for part in parts]
+        if all(isinstance(dtype, np.dtype) and dtype.kind in "biuf" for dtype in dtypes):
+            dtype = np.result_type(*dtypes)
+        else:
+            dtype = object
+
+        values = np.empty(total_rows, dtype=dtype)
+        offset = 0
+        for part in parts:
+            values[offset:offset + len(part)] = part.to_numpy(dtype=dtype)
+            offset += len(part)
+        columns[column] = values
+
+    return pd.DataFrame(columns, copy=False)
+
+
+# Implementing a class for ingesting data split across several csv shards, in a zip file or a directory.
+class ShardedDataIngestor(DataIngestor):
+
+    def __init__(self, max_workers :int = None, dtype_plan :DtypePlan = None, columns :list = None, filters :list = None):
+        """
+        Parameters:
+        max_workers (int): Number of worker processes parsing shards, defaults to the number of CPUs.
+        dtype_plan (DtypePlan): Optional plan applied to every shard inside its worker.
+        columns (list): Only these columns are parsed from every shard.
+        filters (list): Row filters as (column, operator, value) tuples applied inside the workers.
+        """
+        self.max_workers = max_workers
+        self.dtype_plan = dtype_plan
+        self.columns = columns
+        self.filters = filters
+
+    def ingest(self, file_path :str) -> dict:
+
+        if os.path.isdir(file_path):
+            shards = [
+                (os.path.join(file_path, file), None)
+                for file in sorted(os.listdir(file_path)) if file.endswith(".csv")
+            ]
+        elif file_path.endswith(".zip"):
+            with zipfile.ZipFile(file_path, "r") as zip_f:
+                shards = [
+                    (file_path, member)
+                    for member in sorted(zip_f.namelist()) if member.endswith(".csv")
+                ]
+        else:
+            raise CustomException("The provided path is neither a zip file nor a directory.", sys)
+
+        if len(shards) == 0:
+            raise FileNotFoundError("There is no csv file")
+
+        self._check_headers(shards)
+
+        logging.info(f"Parsing {len(shards)} csv shards from {file_path} in a process pool.")
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                _read_csv_shard,
+                [source for source, _ in shards],
+                [member for _, member in shards],
+                [self.dtype_plan] * len(shards),
+                [self.columns] * len(shards),
+                [self.filters] * len(shards),
+            ))
+
+        df = _concat_preallocated([frame for frame, _ in results])
+        logging.info(f"Concatenated {len(shards)} shards into {len(df)} rows.")
+
+        output = {
+            "dataframe" : df,
+            "file_path" : file_path,
+        }
+        if self.dtype_plan is not None:
+            output["memory_report"] = {
+                "before_bytes": sum(report["before_bytes"] for _, report in results),
+                "after_bytes": int(df.memory_usage(index=False, deep=True).sum()),
+            }
+
+        return output
+
+    @staticmethod
+    def _check_headers(shards :list) -> None:
+        """
+        Reads only the header line of every shard and fails before any parsing if they differ.
+        """
+        expected_header = None
+
+        for source, member in shards:
+            if member is None:
+                header = pd.read_csv(source, nrows=0).columns.tolist()
+            else:
+                with zipfile.ZipFile(source, "r") as zip_f, zip_f.open(member) as shard:
+                    header = pd.read_csv(shard, nrows=0).columns.tolist()
+
+            if expected_header is None:
+                expected_header = header
+            elif header != expected_header:
+                shard_name = member or source
+                raise ValueError(f"The header of shard {shard_name} does not match the header of the first shard.")
+
+
+
+# Implementing a class for data ingestion from parquet files, projection and filters are pushed down into the reader.
+class ParquetDataIngestor(DataIngestor):
+
+    def __init__(self, columns :list = None, filters :list = None):
+        """
+        Parameters:
+        columns (list): Only these columns are decoded from the file.
+        filters (list): Row filters as (column, operator, value) tuples, row groups whose statistics
+                        rule them out are skipped without being decoded.
+        """
+        self.columns = columns
+        self.filters = filters
+
+    def ingest(self, file_path :str) -> dict:
+
+        if not file_path.endswith(".parquet"):
+            raise CustomException("The provided file is not a parquet file.", sys)
+
+        filters = [tuple(row_filter) for row_filter in self.filters] if self.filters else None
+
+        try:
+            df = pd.read_parquet(file_path, columns=self.columns, filters=filters)
+        except ImportError as e:
+            raise CustomException(f"Reading parquet files requires pyarrow: {e}", sys)
+
+        logging.info(f"Read {len(df)} rows and {len(df.columns)} columns from {file_path}")
+
+        return {
+            "dataframe" : df,
+            "file_path" : file_path,
+        }
+
+
+# Implementing a class for data ingestion from json lines files holding one flat record per line.
+class JsonLinesDataIngestor(DataIngestor):
+
+    def __init__(self, columns :list = None, filters :list = None, chunk_size :int = 100_000):
+        """
+        Parameters:
+        columns (list): Only these columns are kept, the rest of every chunk is dropped right after decoding.
+        filters (list): Row filters as (column, operator, value) tuples applied to every chunk.
+        chunk_size (int): Number of lines decoded per chunk.
+        """
+        self.columns = columns
+        self.filters = filters
+        self.chunk_size = chunk_size
+
+    def ingest(self, file_path :str) -> dict:
+
+        if not file_path.endswith(".jsonl"):
+            raise CustomException("The provided file is not a json lines file.", sys)
+
+        chunks = []
+        with pd.read_json(file_path, lines=True, chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                if self.columns is not None:
+                    chunk = chunk.reindex(columns=_read_columns(self.columns, self.filters))
+                chunks.append(_apply_row_filters(chunk, self.filters, self.columns))
+
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=self.columns)
+        logging.info(f"Read {len(df)} rows and {len(df.columns)} columns from {file_path}")
+
+        return {
+            "dataframe" : df,
+            "file_path" : file_path,
+        }
+
+
+# Implementing a class that wraps another ingestor and only returns the rows that are new or changed since the last run.
+class IncrementalDataIngestor(DataIngestor):
+
+    def __init__(self, ingestor :DataIngestor, index_path :str, key_column :str = "PID", commit :bool = False,
+                 history_path :str = None):
+        """
+        Parameters:
+        ingestor (DataIngestor): The ingestor that reads the full dataset.
+        index_path (str): Path of the .npz delta index with the keys and row hashes seen so far.
+        key_column (str): Integer column identifying a sale, e.g. "PID" or "Order".
+        commit (bool): If True, the index is updated with the ingested rows right away. Otherwise the
+                       updated index is saved as pending and only replaces the index through
+                       `commit_pending`, once the rest of the pipeline succeeded, so the
+                       rows of a failed run are delivered again by the next one.
+        history_path (str): Optional parquet file with every row ingested so far. The delta is merged
+                            into it (changed rows replace their old version) and the merged frame is
+                            returned instead of the delta alone, so a model is trained on the whole
+                            history. It is committed together with the index.
+        """
+        self.ingestor = ingestor
+        self.index_path = index_path
+        self.key_column = key_column
+        self.commit = commit
+        self.history_path = history_path
+
+    @staticmethod
+    def pending_history_path(history_path :str) -> str:
+        return f"{history_path}.pending.parquet"
+
+    @staticmethod
+    def commit_pending(index_path :str, history_path :str = None) -> bool:
+        """
+        Replaces the index, and the history when there is one, with their pending versions.
+        Returns False when there is nothing pending.
+        """
+        if history_path:
+            pending_history_path = IncrementalDataIngestor.pending_history_path(history_path)
+            if os.path.exists(pending_history_path):
+                os.replace(pending_history_path, history_path)
+                logging.info(f"Committed the pending row history to {history_path}")
+        return DeltaIndex.commit_pending(index_path)
+
+    def _merge_history(self, delta :pd.DataFrame) -> pd.DataFrame:
+        if not os.path.exists(self.history_path):
+            logging.info(f"No row history at {self.history_path}, the delta is the whole history.")
+            return delta
+
+        history = pd.read_parquet(self.history_path)
+        kept = history[~history[self.key_column].isin(delta[self.key_column])]
+        return pd.concat([kept, delta], ignore_index=True)
+
+    def ingest(self, file_path :str) -> dict:
+
+        output = self.ingestor.ingest(file_path)
+        df = output["dataframe"]
+
+        keys = df[self.key_column].to_numpy(dtype=np.int64)
+        hashes = row_hashes(df)
+
+        index = DeltaIndex.load(self.index_path)
+        new_rows, changed_rows = index.diff(keys, hashes)
+        delta = df[new_rows | changed_rows].reset_index(drop=True)
+
+        delta_stats = {
+            "new": int(new_rows.sum()),
+            "changed": int(changed_rows.sum()),
+            "unchanged": int(len(df) - new_rows.sum() - changed_rows.sum()),
+        }
+        logging.info(f"Incremental ingestion of {file_path}: {delta_stats}")
+
+        dataframe = delta
+        if self.history_path:
+            dataframe = self._merge_history(delta)
+            history_path = self.history_path if self.commit else self.pending_history_path(self.history_path)
+            os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+            dataframe.to_parquet(history_path, index=False)
+            delta_stats["history"] = len(dataframe)
+
+        index.update(keys, hashes)
+        index.save(self.index_path if self.commit else DeltaIndex.pending_path(self.index_path))
+
+        return {
+            **output,
+            "dataframe" : dataframe,
+            "delta" : delta,
+            "delta_stats" : delta_stats,
+        }
+
+
+def compare_csv_engines(file_path :str, engines :tuple = ("c", "pyarrow"), repeat :int = 3) -> pd.DataFrame:
+    """
+    Times every csv engine side by side on the csv inside the zip file, streaming it so no
+    extraction is timed, and checks that each engine returns the same columns and dtypes as the C parser.
+
+    Returns:
+    pd.DataFrame: One row per engine with the best wall time over `repeat` runs and the throughput.
+    """
+    reference = None
+    report = []
+
+    for engine in engines:
+        ingestor = ZipDataIngestor(stream=True, engine=engine)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = ingestor.ingest(file_path)["dataframe"]
+            timings.append(time.perf_counter() - start)
+
+        if reference is None:
+            reference = df.dtypes
+        best_seconds = min(timings)
+
+        report.append({
+            "engine": engine,
+            "rows": len(df),
+            "best_seconds": best_seconds,
+            "rows_per_second": len(df) / best_seconds,
+            "same_schema": df.dtypes.equals(reference),
+        })
+        logging.info(f"csv engine {engine}: {len(df)} rows in {best_seconds:.3f}s")
+
+    return pd.DataFrame(report)
+
+
+def _parquet_null_rates(file_path :str):
+    """
+    Null rates from the row group statistics in the parquet footer, None when a column has no null count.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise CustomException(f"Reading parquet files requires pyarrow: {e}", sys)
+
+    metadata = pq.ParquetFile(file_path).metadata
+    null_counts = {}
+    for row_group in range(metadata.num_row_groups):
+        group = metadata.row_group(row_group)
+        for position in range(group.num_columns):
+            column = group.column(position)
+            statistics = column.statistics
+            if statistics is None or not statistics.has_null_count:
+                return None
+            name = column.path_in_schema
+            null_counts[name] = null_counts.get(name, 0) + statistics.null_count
+
+    return pd.Series(null_counts, dtype=np.float64) / max(metadata.num_rows, 1)
+
+
+def _sample_step(open_stream, n_bytes :int, sample_rows :int) -> int:
+    # the row count is estimated from the line length of the first 64 KB
+    with open_stream() as stream:
+        head = stream.read(64 * 1024)
+    bytes_per_row = len(head) / max(head.count(b"\n"), 1)
+    return max(1, int(n_bytes / bytes_per_row) // max(sample_rows, 1))
+
+
+def _sample_csv(open_stream, n_bytes :int, sample_rows :int) -> pd.DataFrame:
+    """
+    About `sample_rows` rows taken at an even stride over the whole csv, so a sorted file is
+    sampled over its full range. The skipped rows are only tokenized by the parser, not converted.
+    """
+    step = _sample_step(open_stream, n_bytes, sample_rows)
+    with open_stream() as stream:
+        # line 0 is the header
+        return pd.read_csv(stream, skiprows=lambda line: line > 0 and line % step != 0)
+
+
+def _sample_frame(file_path :str, sample_rows :int) -> pd.DataFrame:
+    if os.path.isdir(file_path):
+        shards = sorted(os.path.join(file_path, file) for file in os.listdir(file_path) if file.endswith(".csv"))
+        if not shards:
+            raise FileNotFoundError("There is no csv file")
+        # every shard gets its share of the sample by size
+        total_bytes = max(sum(os.path.getsize(shard) for shard in shards), 1)
+        return pd.concat([
+            _sample_csv(lambda shard=shard: open(shard, "rb"), os.path.getsize(shard),
+                        sample_rows * os.path.getsize(shard) // total_bytes)
+            for shard in shards
+        ], ignore_index=True)
+    if file_path.endswith(".zip"):
+        with zipfile.ZipFile(file_path, "r") as zip_f:
+            member = zip_f.getinfo(ZipDataIngestor._find_csv_member(zip_f))
+            return _sample_csv(lambda: zip_f.open(member), member.file_size, sample_rows)
+    if file_path.endswith(".jsonl"):
+        step = _sample_step(lambda: open(file_path, "rb"), os.path.getsize(file_path), sample_rows)
+        with open(file_path) as jsonl_f:
+            lines = [line for position, line in enumerate(jsonl_f) if position % step == 0]
+        return pd.read_json(io.StringIO("".join(lines)), lines=True)
+    raise ValueError(f"Can not sample the null rates of {file_path}")
+
+
+def estimate_null_rates(file_path :str, cache :DatasetCache = None, sample_rows :int = 10_000) -> pd.Series:
+    """
+    Per-column null rates of a dataset without a full scan, from the cheapest source available:
+    the parquet footer statistics, the null counts recorded with a dataset cache entry of the same
+    archive content, or else about `sample_rows` rows sampled evenly over the whole file.
+    """
+    if file_path.endswith(".parquet"):
+        null_rates = _parquet_null_rates(file_path)
+        if null_rates is not None:
+            logging.info(f"Null rates of {file_path} read from the parquet metadata.")
+            return null_rates
+
+    if cache is not None and file_path.endswith(".zip"):
+        with zipfile.ZipFile(file_path, "r") as zip_f:
+            member = zip_f.getinfo(ZipDataIngestor._find_csv_member(zip_f))
+        null_counts, n_rows = cache.null_counts(file_path, member)
+        if null_counts is not None:
+            logging.info(f"Null rates of {file_path} read from the dataset cache metadata.")
+            return pd.Series(null_counts, dtype=np.float64) / max(n_rows, 1)
+
+    logging.info(f"Estimating the null rates of {file_path} on about {sample_rows} rows sampled over the file.")
+    return _sample_frame(file_path, sample_rows).isna().mean()
+
+
 class DataIngestorFactory:
 
     @staticmethod
-    def get_data_ingestor(file_path :str) -> DataIngestor:
+    def get_data_ingestor(file_path :str, **kwargs) -> DataIngestor:
+        """
+        Returns the ingestor for the given file or directory. Keyword arguments are passed on
+        to the constructor of the ingestor, options it does not take are ignored.
+        """
 
         file_extension = os.path.splitext(file_path)[1]
 
-        if file_extension == ".zip":
-            return ZipDataIngestor()
+        if os.path.isdir(file_path):
+            return DataIngestorFactory._build(ShardedDataIngestor, kwargs)
+        elif file_extension == ".zip":
+            with zipfile.ZipFile(file_path, "r") as zip_f:
+                csv_members = [member for member in zip_f.namelist() if member.endswith(".csv")]
+
+            if len(csv_members) > 1:
+                return DataIngestorFactory._build(ShardedDataIngestor, kwargs)
+            return DataIngestorFactory._build(ZipDataIngestor, kwargs)
+        elif file_extension == ".parquet":
+            return DataIngestorFactory._build(ParquetDataIngestor, kwargs)
+        elif file_extension == ".jsonl":
+            return DataIngestorFactory._build(JsonLinesDataIngestor, kwargs)
         else:
             logging.error(f"No data ingestor for file with extension {file_path}")
             raise ValueError(f"No data ingestor for file with extension {file_extension} ")
+
+    @staticmethod
+    def _build(ingestor_class :type, options :dict) -> DataIngestor:
+
+        accepted = inspect.signature(ingestor_class.__init__).parameters
+        ignored = [option for option in options if option not in accepted]
+        if ignored:
+            logging.info(f"{ingestor_class.__name__} ignores the options {ignored}")
+
+        return ingestor_class(**{option: value for option, value in options.items() if option in accepted})
             
 
 
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+"""
+Content addressed cache for ingested datasets.
+
+Every entry is a directory named after the hash of the archive content and the CRC of the
+csv member it was parsed from. Each column is stored as its own typed .npy file, strings are
+stored as integer codes plus their categories, so a cache hit is a memory map with no text parsing.
+"""
+
+
+class DatasetCache:
+    def __init__(self, cache_dir :str = "artifacts/cache", max_bytes :int = 2 * 1024 ** 3):
+        """
+        Parameters:
+        cache_dir (str): Directory holding the cache entries.
+        max_bytes (int): Upper bound for the total size of the cache, least recently used entries are evicted first.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _archive_digest(file_path :str, block_size :int = 1024 * 1024):
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as archive:
+            for block in iter(lambda: archive.read(block_size), b""):
+                digest.update(block)
+        return digest
+
+    @staticmethod
+    def _member_key(archive_digest, member :zipfile.ZipInfo, variant :str) -> str:
+        digest = archive_digest.copy()
+        digest.update(f"{member.filename}:{member.CRC:08x}:{variant}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(file_path :str, member :zipfile.ZipInfo, variant :str = "") -> str:
+        """
+        Builds the cache key from the archive content hash and the CRC of the csv member.
+        `variant` separates entries of the same member that were parsed with different options.
+        """
+        return DatasetCache._member_key(DatasetCache._archive_digest(file_path), member, variant)
+
+    def entry_path(self, key :str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key :str):
+        """
+        Memory maps the cached DataFrame for the key, returns None on a cache miss.
+        """
+        entry = self.entry_path(key)
+        meta_path = os.path.join(entry, "meta.json")
+        if not os.path.exists(meta_path):
+            logging.info(f"Dataset cache miss for key {key}")
+            return None
+
+        with open(meta_path) as meta_f:
+            meta = json.load(meta_f)
+
+        columns = {}
+        for position, column in enumerate(meta["columns"]):
+            # copy-on-write mapping, so downstream in-place edits never touch the cache file
+            values = np.load(os.path.join(entry, f"{position}.npy"), mmap_mode="c")
+
+            if column["kind"] == "numeric":
+                columns[column["name"]] = values
+            elif column["kind"] == "category":
+                columns[column["name"]] = pd.Categorical.from_codes(
+                    values, categories=column["categories"], ordered=column["ordered"]
+                )
+            else:
+                categories = np.array(column["categories"] + [np.nan], dtype=object)
+                columns[column["name"]] = categories.take(values)
+
+        # Refreshing the access time drives the least recently used eviction.
+        os.utime(meta_path)
+        logging.info(f"Dataset cache hit for key {key}")
+
+        return pd.DataFrame(columns, copy=False)
+
+    def store(self, key :str, df :pd.DataFrame, source :str, variant :str = "", filtered :bool = False) -> str:
+        """
+        Writes the DataFrame as a cache entry, drops older entries of the same source and variant and
+        evicts least recently used entries until the cache fits into `max_bytes`. `filtered` marks
+        entries holding only the rows kept by row filters, their null counts are not the dataset's.
+        """
+        entry = self.entry_path(key)
+        staging = f"{entry}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        meta = {
+            "source": os.path.abspath(source), "variant": variant, "filtered": filtered,
+            "n_rows": len(df), "columns": [],
+        }
+
+        for position, (name, series) in enumerate(df.items()):
+            column = {"name": name}
+
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                column.update(
+                    kind="category",
+                    categories=series.cat.categories.tolist(),
+                    ordered=bool(series.cat.ordered),
+                )
+                values = series.cat.codes.to_numpy()
+                null_count = int((values < 0).sum())
+            elif series.dtype == object:
+                codes, uniques = pd.factorize(series)
+                column.update(kind="object", categories=uniques.tolist())
+                values = codes.astype(np.int32)
+                null_count = int((values < 0).sum())
+            elif isinstance(series.dtype, np.dtype):
+                column.update(kind="numeric")
+                values = series.to_numpy()
+                null_count = int(np.isnan(values).sum()) if values.dtype.kind == "f" else 0
+            else:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise CustomException(f"Column {name} with dtype {series.dtype} can not be cached.", sys)
+
+            np.save(os.path.join(staging, f"{position}.npy"), values, allow_pickle=False)
+            # kept so later runs can plan on null rates without loading the entry
+            column["null_count"] = null_count
+            meta["columns"].append(column)
+
+        with open(os.path.join(staging, "meta.json"), "w") as meta_f:
+            json.dump(meta, meta_f)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        logging.info(f"Stored dataset cache entry {key} for {source}")
+
+        self._invalidate(meta["source"], variant, keep=key)
+        self._evict()
+        return entry
+
+    def null_counts(self, source :str, member :zipfile.ZipInfo) -> tuple:
+        """
+        Per-column null counts recorded for the member of the archive in its widest unfiltered
+        cache entry, read from the entry's meta.json only. An entry only counts when its key still
+        matches the archive content, so an edited archive never returns the old counts.
+
+        Returns:
+        (dict, int): Null count per column and the number of rows, or (None, 0) without a matching
+                     entry (or one written before null counts were recorded).
+        """
+        best, archive_digest = None, None
+        for key, meta_path in self._entries():
+            with open(meta_path) as meta_f:
+                meta = json.load(meta_f)
+            # entries without the flag predate it and may be filtered
+            if meta["source"] != os.path.abspath(source) or meta.get("filtered", True):
+                continue
+            if not all("null_count" in column for column in meta["columns"]):
+                continue
+            if archive_digest is None:
+                archive_digest = self._archive_digest(source)
+            if key != self._member_key(archive_digest, member, meta.get("variant", "")):
+                continue
+            if best is None or len(meta["columns"]) > len(best["columns"]):
+                best = meta
+
+        if best is None:
+            return None, 0
+        return {column["name"]: column["null_count"] for column in best["columns"]}, best["n_rows"]
+
+    def _entries(self) -> list:
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            # a staging directory of a store in progress (or of a crashed one) is never an entry,
+            # even once its meta.json is written
+            if key.endswith(".tmp"):
+                continue
+            meta_path = os.path.join(self.entry_path(key), "meta.json")
+            if os.path.exists(meta_path):
+                entries.append((key, meta_path))
+        return entries
+
+    def _invalidate(self, source :str, variant :str, keep :str) -> None:
+        # The archive at this path changed, older entries for it can never be hit again.
+        for key, meta_path in self._entries():
+            if key == keep:
+                continue
+            with open(meta_path) as meta_f:
+                meta = json.load(meta_f)
+            if meta["source"] == source and meta.get("variant", "") == variant:
+                logging.info(f"Invalidating stale dataset cache entry {key}")
+                shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for key, meta_path in self._entries():
+            entry = self.entry_path(key)
+            size = sum(
+                os.path.getsize(os.path.join(entry, file_name)) for file_name in os.listdir(entry)
+            )
+            entries.append((os.path.getmtime(meta_path), size, key))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logging.info(f"Evicting dataset cache entry {key} ({size} bytes)")
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+            total -= size
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.logger import logging
+
+"""
+Compact index of the rows that were already ingested, used to find new and changed rows.
+
+Only two arrays are kept on disk: the sorted row keys (e.g. PID) and a 64 bit content hash per row.
+"""
+
+_HASH_MULTIPLIER = np.uint64(1_000_003)
+
+
+def row_hashes(df :pd.DataFrame, columns :list = None) -> np.ndarray:
+    """
+    Hashes the content of every row into one uint64. Numeric columns are hashed as float64 so the
+    hash does not depend on how narrow a dtype the column was read with.
+    """
+    columns = list(df.columns) if columns is None else columns
+    hashes = np.zeros(len(df), dtype=np.uint64)
+
+    for column in columns:
+        series = df[column]
+        if series.dtype.kind in "biuf":
+            series = series.astype(np.float64)
+        column_hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        # uint64 arithmetic wraps around, which is what we want for mixing
+        with np.errstate(over="ignore"):
+            hashes = hashes * _HASH_MULTIPLIER ^ column_hashes
+
+    return hashes
+
+
+class DeltaIndex:
+    def __init__(self, keys :np.ndarray = None, hashes :np.ndarray = None):
+        """
+        Parameters:
+        keys (np.ndarray): Sorted int64 keys of the rows seen so far.
+        hashes (np.ndarray): uint64 content hash of the row with the same position in `keys`.
+        """
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else keys
+        self.hashes = np.empty(0, dtype=np.uint64) if hashes is None else hashes
+
+    @classmethod
+    def load(cls, index_path :str):
+        if not os.path.exists(index_path):
+            logging.info(f"No delta index at {index_path}, every row counts as new.")
+            return cls()
+
+        with np.load(index_path) as index:
+            return cls(index["keys"], index["hashes"])
+
+    @staticmethod
+    def pending_path(index_path :str) -> str:
+        """
+        Path of the index holding the rows of an ingestion that was not committed yet.
+        """
+        return f"{index_path}.pending.npz"
+
+    @classmethod
+    def commit_pending(cls, index_path :str) -> bool:
+        """
+        Replaces the index with the pending one, once the run that ingested its rows succeeded.
+        Returns False when there is nothing pending.
+        """
+        pending_path = cls.pending_path(index_path)
+        if not os.path.exists(pending_path):
+            logging.info(f"No pending delta index for {index_path}, nothing to commit.")
+            return False
+
+        os.replace(pending_path, index_path)
+        logging.info(f"Committed the pending delta index to {index_path}")
+        return True
+
+    def save(self, index_path :str) -> None:
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        # np.savez appends .npz to names without it, write to a name that already has it
+        staging = f"{index_path}.tmp.npz"
+        np.savez(staging, keys=self.keys, hashes=self.hashes)
+        os.replace(staging, index_path)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def diff(self, keys :np.ndarray, hashes :np.ndarray) -> tuple:
+        """
+        Returns:
+        (np.ndarray, np.ndarray): Boolean masks of the rows whose key is new and of the rows whose key
+                                  was seen before with a different content hash.
+        """
+        if len(self.keys) == 0:
+            return np.ones(len(keys), dtype=bool), np.zeros(len(keys), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        changed = found & (self.hashes[positions] != hashes)
+        return ~found, changed
+
+    def update(self, keys :np.ndarray, hashes :np.ndarray) -> None:
+        """
+        Merges the rows into the index, the last occurrence of a key wins.
+        """
+        all_keys = np.concatenate([self.keys, keys])
+        all_hashes = np.concatenate([self.hashes, hashes])
+
+        # np.unique keeps the first occurrence, so run it over the reversed arrays
+        unique_keys, reversed_positions = np.unique(all_keys[::-1], return_index=True)
+        self.keys = unique_keys
+        self.hashes = all_hashes[::-1][reversed_positions]
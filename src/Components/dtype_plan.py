@@ -0,0 +1,133 @@
+import ast
+import hashlib
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.exception import CustomException
+
+"""
+Dtype plan for ingested data.
+
+Columns listed in Model_Input_Schema.txt (plus the target) are numeric and get downcast to the
+narrowest integer that fits or to float32 where that is lossless, every other column is read as `category`.
+"""
+
+
+def load_schema_columns(schema_path :str = "Model_Input_Schema.txt") -> list:
+    """
+    Reads the `expected_columns` list out of the model input schema file.
+    """
+    with open(schema_path) as schema_f:
+        _, _, columns = schema_f.read().partition("=")
+
+    try:
+        return list(ast.literal_eval(columns.strip()))
+    except (ValueError, SyntaxError) as e:
+        raise CustomException(f"Could not parse the column list in {schema_path}: {e}", sys)
+
+
+def concat_frames(frames :list) -> pd.DataFrame:
+    """
+    Concatenates frames row-wise, unioning the categories of categorical columns so they
+    stay categorical instead of falling back to object.
+    """
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0]
+
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = union_categoricals(
+                [frame[column] for frame in frames], sort_categories=True
+            ).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def _object_memory_usage(series :pd.Series) -> int:
+    """
+    Memory the categorical column would have taken as an object column, computed from the categories
+    so the strings are never materialized.
+    """
+    counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(series.cat.categories) + 1)
+    sizes = [sys.getsizeof(np.nan)] + [sys.getsizeof(value) for value in series.cat.categories]
+    return int(np.dot(counts, sizes) + 8 * len(series))
+
+
+class DtypePlan:
+    def __init__(self, numeric_columns :list, categorical_columns :list = None):
+        """
+        Parameters:
+        numeric_columns (list): Columns that are downcast to the narrowest numeric dtype.
+        categorical_columns (list): Columns read as `category`, by default every column that is not numeric.
+        """
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = None if categorical_columns is None else list(categorical_columns)
+
+    @classmethod
+    def from_schema(cls, schema_path :str = "Model_Input_Schema.txt", target_column :str = "SalePrice",
+                    categorical_columns :list = None):
+        """
+        Builds the plan from the model input schema, the target column is treated as numeric too.
+        """
+        numeric_columns = load_schema_columns(schema_path) + [target_column]
+        return cls(numeric_columns, categorical_columns)
+
+    def fingerprint(self) -> str:
+        """
+        Returns a stable hash of the plan's numeric and categorical columns, so cached frames read
+        with one plan are never served for another.
+        """
+        categorical_columns = None if self.categorical_columns is None else sorted(self.categorical_columns)
+        plan = json.dumps([sorted(self.numeric_columns), categorical_columns])
+        return hashlib.sha256(plan.encode()).hexdigest()
+
+    def read_dtypes(self, header :list) -> dict:
+        """
+        Returns the `dtype` argument for `pd.read_csv` given the header of the file.
+        """
+        if self.categorical_columns is None:
+            categorical_columns = [column for column in header if column not in self.numeric_columns]
+        else:
+            categorical_columns = [column for column in self.categorical_columns if column in header]
+
+        return {column: "category" for column in categorical_columns}
+
+    def optimize(self, df :pd.DataFrame) -> tuple:
+        """
+        Downcasts the numeric columns of the DataFrame in place.
+
+        Returns:
+        (pd.DataFrame, dict): The DataFrame and a report with its memory before and after the plan,
+                              where "before" is the footprint with the default int64/float64/object dtypes.
+        """
+        before = 0
+        for column, series in df.items():
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                before += _object_memory_usage(series)
+                continue
+
+            before += series.memory_usage(index=False, deep=True)
+            if column not in self.numeric_columns:
+                continue
+
+            if series.dtype.kind in "iu":
+                df[column] = pd.to_numeric(series, downcast="integer")
+            elif series.dtype.kind == "f":
+                values = series.to_numpy()
+                narrowed = values.astype(np.float32)
+                # float32 only where every value survives the round trip unchanged
+                if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+                    df[column] = narrowed
+
+        report = {
+            "before_bytes": int(before),
+            "after_bytes": int(df.memory_usage(index=False, deep=True).sum()),
+        }
+        return df, report
@@ -1,9 +1,16 @@
 from src.logger import logging
+from src.exception import CustomException
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import inspect
+import json
+import sys
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+from sklearn.utils import murmurhash3_32
 
 
 # This class defines a common interface for different feature engineering strategies.
@@ -22,16 +29,21 @@ class FeatureEngineeringStrategy(ABC):
 
 # This strategy applies a logarithmic transformation to skewed features to normalize the distribution.
 class LogTransformation(FeatureEngineeringStrategy):
-    def __init__(self, features):
+    def __init__(self, features, copy=True):
         """
         Initializes the LogTransformation with the specific features to transform.
+
+        Parameters:
+        features (list): The list of features to apply the log transformation to.
+        copy (bool): If False, the caller gives up the input frame and it is transformed in place.
         """
         self.features = features
+        self.copy = copy
 
     def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         
         logging.info(f"Applying log transformation to features: {self.features}")
-        df_transformed = dataframe.copy()
+        df_transformed = dataframe.copy() if self.copy else dataframe
         for feature in self.features:
             df_transformed[feature] = np.log1p(
                 dataframe[feature]
@@ -41,40 +53,135 @@ class LogTransformation(FeatureEngineeringStrategy):
 
 
 
-# This strategy applies standard scaling (z-score normalization) to features, centering them around zero with unit variance.
-class StandardScaling(FeatureEngineeringStrategy):
-    def __init__(self, features):
+# Scaling strategies fitted once and then applied as x * scale + offset, e.g. to serving batches.
+class AffineScaling(FeatureEngineeringStrategy):
+    def __init__(self, features, copy=True):
+        """
+        Parameters:
+        features (list): The list of features to scale.
+        copy (bool): If False, the caller gives up the input frame and it is transformed in place.
+        """
         self.features = features
+        self.copy = copy
+        self.scale_ = None
+        self.offset_ = None
+
+    @abstractmethod
+    def _fit_affine(self, values: np.ndarray) -> tuple:
+        """
+        Returns the per-feature (scale, offset) float arrays of the scaling.
+        """
+        pass
+
+    def _params(self) -> dict:
+        # constructor arguments besides the features that are saved with the state
+        return {}
+
+    def fit(self, dataframe: pd.DataFrame) -> "AffineScaling":
+        return self._fit_values(dataframe[self.features].to_numpy(dtype=np.float64))
+
+    def _fit_values(self, values: np.ndarray) -> "AffineScaling":
+        scale, offset = self._fit_affine(values)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.offset_ = np.asarray(offset, dtype=np.float64)
+        return self
+
+    def transform(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Scales the features with the fitted state, one multiply-add in place over the feature block.
+        """
+        if self.scale_ is None:
+            raise CustomException(f"{type(self).__name__} has to be fitted before transform.", sys)
+
+        df_transformed = dataframe.copy() if self.copy else dataframe
+        values = dataframe[self.features].to_numpy(dtype=np.float64, copy=True)
+        values *= self.scale_
+        values += self.offset_
+        df_transformed[self.features] = values
+        return df_transformed
+
+    def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(dataframe).transform(dataframe)
+
+    def save(self, file_path: str) -> None:
+        """
+        Persists the fitted scale and offset of every feature as a small json artifact.
+        """
+        if self.scale_ is None:
+            raise CustomException(f"{type(self).__name__} has to be fitted before it is saved.", sys)
+
+        with open(file_path, "w") as artifact_f:
+            json.dump({
+                "features": list(self.features),
+                "scale": self.scale_.tolist(),
+                "offset": self.offset_.tolist(),
+                **self._params(),
+            }, artifact_f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "AffineScaling":
+        with open(file_path) as artifact_f:
+            artifact = json.load(artifact_f)
+
+        strategy = cls(**{key: value for key, value in artifact.items() if key not in ("scale", "offset")})
+        strategy.scale_ = np.array(artifact["scale"], dtype=np.float64)
+        strategy.offset_ = np.array(artifact["offset"], dtype=np.float64)
+        return strategy
+
+
+
+# This strategy applies standard scaling (z-score normalization) to features, centering them around zero with unit variance.
+class StandardScaling(AffineScaling):
+    def __init__(self, features, copy=True):
+        """
+        Parameters:
+        features (list): The list of features to apply the standard scaling to.
+        copy (bool): If False, the caller gives up the input frame and it is transformed in place.
+        """
+        super().__init__(features, copy=copy)
         self.scaler = StandardScaler()
 
+    def _fit_affine(self, values: np.ndarray) -> tuple:
+        # (x - mean) / std as x * (1 / std) - mean / std, sklearn's std is 1 for constant features
+        self.scaler.fit(values)
+        scale = 1.0 / self.scaler.scale_
+        return scale, -self.scaler.mean_ * scale
+
     def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
   
         logging.info(f"Applying standard scaling to features: {self.features}")
-        df_transformed = dataframe.copy()
-        df_transformed[self.features] = self.scaler.fit_transform(dataframe[self.features])
+        df_transformed = super().apply_transformation(dataframe)
         logging.info("Standard scaling completed.")
         return df_transformed
 
 
 
 # This strategy applies Min-Max scaling to features, scaling them to a specified range, typically [0, 1].
-class MinMaxScaling(FeatureEngineeringStrategy):
-    def __init__(self, features, feature_range=(0, 1)):
+class MinMaxScaling(AffineScaling):
+    def __init__(self, features, feature_range=(0, 1), copy=True):
         """
         Parameters:
         features (list): The list of features to apply the Min-Max scaling to.
         feature_range (tuple): The target range for scaling, default is (0, 1).
+        copy (bool): If False, the caller gives up the input frame and it is transformed in place.
         """
-        self.features = features
-        self.scaler = MinMaxScaler(feature_range=feature_range)
+        super().__init__(features, copy=copy)
+        self.scaler = MinMaxScaler(feature_range=tuple(feature_range))
+
+    def _fit_affine(self, values: np.ndarray) -> tuple:
+        # sklearn already transforms as x * scale_ + min_
+        self.scaler.fit(values)
+        return self.scaler.scale_, self.scaler.min_
+
+    def _params(self) -> dict:
+        return {"feature_range": list(self.scaler.feature_range)}
 
     def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
 
         logging.info(
             f"Applying Min-Max scaling to features: {self.features} with range {self.scaler.feature_range}"
         )
-        df_transformed = dataframe.copy()
-        df_transformed[self.features] = self.scaler.fit_transform(dataframe[self.features])
+        df_transformed = super().apply_transformation(dataframe)
         logging.info("Min-Max scaling completed.")
         return df_transformed
 
@@ -82,25 +189,429 @@ class MinMaxScaling(FeatureEngineeringStrategy):
 
 # This strategy applies one-hot encoding to categorical features, converting them into binary vectors.
 class OneHotEncoding(FeatureEngineeringStrategy):
-    def __init__(self, features):
-
+    def __init__(self, features, copy=True, sparse=False):
+        """
+        Parameters:
+        features (list): The list of categorical features to encode.
+        copy (bool): If False, the caller gives up the input frame and the encoded columns replace
+                     the features in it instead of being concatenated into a new frame.
+        sparse (bool): If True, the encoded columns are pandas sparse columns holding only their ones,
+                       model building turns them into a CSR matrix without densifying them. The
+                       stages keep them sparse between steps with SparseFrameMaterializer.
+        """
         self.features = features
-        self.encoder = OneHotEncoder(sparse=False, drop="first")
+        self.copy = copy
+        self.sparse = sparse
+        self.encoder = OneHotEncoder(sparse_output=sparse, drop="first")
 
     def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
 
         logging.info(f"Applying one-hot encoding to features: {self.features}")
+        encoded = self.encoder.fit_transform(dataframe[self.features])
+        encoded_columns = self.encoder.get_feature_names_out(self.features)
+        if self.sparse:
+            encoded_df = pd.DataFrame.sparse.from_spmatrix(encoded, columns=encoded_columns)
+        else:
+            encoded_df = pd.DataFrame(encoded, columns=encoded_columns)
+
+        if not self.copy:
+            dataframe.drop(columns=self.features, inplace=True)
+            dataframe.reset_index(drop=True, inplace=True)
+            dataframe[list(encoded_columns)] = encoded_df
+            logging.info("One-hot encoding completed.")
+            return dataframe
+
         df_transformed = dataframe.copy()
-        encoded_df = pd.DataFrame(
-            self.encoder.fit_transform(dataframe[self.features]),
-            columns=self.encoder.get_feature_names_out(self.features),
-        )
         df_transformed = df_transformed.drop(columns=self.features).reset_index(drop=True)
         df_transformed = pd.concat([df_transformed, encoded_df], axis=1)
         logging.info("One-hot encoding completed.")
         return df_transformed
 
 
+# This strategy hashes categorical features into a fixed number of columns, for categoricals of unbounded cardinality.
+class FeatureHashing(FeatureEngineeringStrategy):
+    def __init__(self, features, n_features=1024, alternate_sign=True, sparse=True, prefix="hashed", copy=True):
+        """
+        Every non missing value becomes the token "feature=value", hashed with the signed 32 bit
+        murmurhash3 of sklearn's FeatureHasher: the hash picks one of `n_features` output columns and,
+        with `alternate_sign`, its sign picks +1 or -1, so colliding tokens cancel out on average
+        instead of piling up. Nothing is fitted, the same record always lands in the same columns.
+
+        Only the distinct values of every column are hashed, the rows are mapped through their codes.
+
+        Parameters:
+        features (list): The list of categorical features to hash, they are replaced by the hashed columns.
+        n_features (int): Fixed number of output columns.
+        alternate_sign (bool): Whether the hash sign sets the sign of the value.
+        sparse (bool): If True, the hashed columns are pandas sparse columns (see OneHotEncoding),
+                       they stay sparse between the pipeline steps and reach the model as CSR.
+                       With False the output is n_features dense float64 columns.
+        prefix (str): Prefix of the output column names, "{prefix}_{index}".
+        copy (bool): Accepted like on the other strategies, but the hashed columns always go into a
+                     new frame built by a single concat: writing the wide block into the input
+                     frame column by column is several times slower and fragments it.
+        """
+        self.features = features
+        self.n_features = n_features
+        self.alternate_sign = alternate_sign
+        self.sparse = sparse
+        self.prefix = prefix
+        self.copy = copy
+
+    @property
+    def output_columns(self) -> list:
+        return [f"{self.prefix}_{index}" for index in range(self.n_features)]
+
+    @staticmethod
+    def _token(feature: str, value) -> str:
+        # A numeric column holding a missing value is float in training but int in a served
+        # record, integral floats are written as ints so both hash the same token.
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            value = int(value)
+        return f"{feature}={value}"
+
+    def _hash(self, token: str) -> tuple:
+        # index and sign of the token, the same rule as FeatureHasher
+        hashed = murmurhash3_32(token, seed=0)
+        sign = -1.0 if self.alternate_sign and hashed < 0 else 1.0
+        return abs(hashed) % self.n_features, sign
+
+    def hash_frame(self, dataframe: pd.DataFrame) -> sp.csr_matrix:
+        rows, indices, values = [], [], []
+        for feature in self.features:
+            codes, uniques = pd.factorize(dataframe[feature])
+            hashed = [self._hash(self._token(feature, value)) for value in uniques]
+            unique_indices = np.array([index for index, _ in hashed], dtype=np.int32)
+            unique_signs = np.array([sign for _, sign in hashed], dtype=np.float64)
+
+            present = np.flatnonzero(codes >= 0)
+            rows.append(present)
+            indices.append(unique_indices[codes[present]])
+            values.append(unique_signs[codes[present]])
+
+        # duplicate (row, column) entries of colliding tokens are summed by the conversion
+        return sp.coo_matrix(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(indices))),
+            shape=(len(dataframe), self.n_features),
+        ).tocsr()
+
+    def encode_record(self, record: dict) -> dict:
+        """
+        Hashed columns of a single record, only the non zero ones, for serving.
+        """
+        encoded = {}
+        for feature in self.features:
+            value = record.get(feature)
+            if pd.isna(value):
+                continue
+            index, sign = self._hash(self._token(feature, value))
+            column = f"{self.prefix}_{index}"
+            encoded[column] = encoded.get(column, 0.0) + sign
+        return {column: value for column, value in encoded.items() if value}
+
+    def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+
+        logging.info(f"Applying feature hashing to features: {self.features} into {self.n_features} columns")
+        hashed = self.hash_frame(dataframe)
+        if self.sparse:
+            hashed_df = pd.DataFrame.sparse.from_spmatrix(hashed, columns=self.output_columns)
+        else:
+            hashed_df = pd.DataFrame(hashed.toarray(), columns=self.output_columns)
+
+        df_transformed = pd.concat([dataframe.drop(columns=self.features).reset_index(drop=True), hashed_df], axis=1)
+        logging.info("Feature hashing completed.")
+        return df_transformed
+
+
+
+def fold_statistics(codes: np.ndarray, target: np.ndarray, n_categories: list) -> list:
+    """
+    Target sum and row count of every category of every feature over the rows of one fold.
+    Runs in the worker processes of TargetEncoding, so it has to stay a module level function.
+
+    Parameters:
+    codes (np.ndarray): (rows, features) category codes of the fold's rows.
+    target (np.ndarray): Target values of the fold's rows.
+    n_categories (list): Number of categories of every feature.
+
+    Returns:
+    list: (sums, counts) arrays of every feature.
+    """
+    return [
+        (
+            np.bincount(codes[:, position], weights=target, minlength=n_categories[position]),
+            np.bincount(codes[:, position], minlength=n_categories[position]),
+        )
+        for position in range(codes.shape[1])
+    ]
+
+
+# This strategy replaces categorical features with the smoothed mean of the target per category.
+class TargetEncoding(FeatureEngineeringStrategy):
+    def __init__(self, features, target="SalePrice", n_splits=5, smoothing=10.0, max_workers=None,
+                 random_state=42, copy=True):
+        """
+        Every category becomes (target sum + smoothing * prior) / (count + smoothing), the category
+        mean shrunk towards the overall mean (the prior) the more the rarer the category is. Missing
+        values are a category of their own.
+
+        On the frame it is applied to, every row is encoded out-of-fold: the rows are shuffled into
+        `n_splits` folds and the rows of a fold get the statistics of the other folds only, so no row
+        sees its own target. The per-fold sums and counts are computed in `max_workers` processes
+        and the out-of-fold statistics are the totals minus the fold's own.
+
+        The table fitted on all the rows is kept for new data: `transform` and `encode_record`
+        look every category up in it and give unseen categories the prior.
+
+        Fit it on the training rows only, after the train/test split, and encode the test rows with
+        `transform`. Applied to the full frame, the out-of-fold encoding of the training rows is
+        computed from the test rows' targets too, which leaks the hold-out target into training.
+
+        Parameters:
+        features (list): The list of categorical features to encode, they are replaced by their encodings.
+        target (str): The target column.
+        n_splits (int): Number of folds of the out-of-fold encoding.
+        smoothing (float): Weight of the prior, in rows.
+        max_workers (int): Number of processes the fold statistics are computed in.
+        random_state (int): Seed of the fold assignment.
+        copy (bool): If False, the caller gives up the input frame and it is transformed in place.
+        """
+        self.features = features
+        self.target = target
+        self.n_splits = n_splits
+        self.smoothing = smoothing
+        self.max_workers = max_workers
+        self.random_state = random_state
+        self.copy = copy
+        self.prior_ = None
+        self.table_ = None
+
+    @staticmethod
+    def _factorize(series: pd.Series) -> tuple:
+        # missing values get a code of their own, their key is None
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        return codes, [None if pd.isna(value) else value.item() if isinstance(value, np.generic) else value
+                       for value in uniques]
+
+    def _smooth(self, sums: np.ndarray, counts: np.ndarray, prior: float) -> np.ndarray:
+        return (sums + self.smoothing * prior) / (counts + self.smoothing)
+
+    def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+
+        logging.info(f"Applying {self.n_splits}-fold target encoding of {self.target} to features: {self.features}")
+        target = dataframe[self.target].to_numpy(dtype=np.float64)
+        factorized = [self._factorize(dataframe[feature]) for feature in self.features]
+        codes = np.column_stack([feature_codes for feature_codes, _ in factorized])
+        n_categories = [len(uniques) for _, uniques in factorized]
+
+        folds = np.random.default_rng(self.random_state).permutation(len(dataframe)) % self.n_splits
+        fold_rows = [np.flatnonzero(folds == fold) for fold in range(self.n_splits)]
+        tasks = [(codes[rows], target[rows], n_categories) for rows in fold_rows]
+        if self.max_workers and self.max_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                statistics = list(executor.map(fold_statistics, *zip(*tasks)))
+        else:
+            statistics = [fold_statistics(*task) for task in tasks]
+
+        df_transformed = dataframe.copy() if self.copy else dataframe
+        self.prior_ = float(target.mean())
+        self.table_ = {}
+        for position, (feature, (_, uniques)) in enumerate(zip(self.features, factorized)):
+            sums = sum(fold[position][0] for fold in statistics)
+            counts = sum(fold[position][1] for fold in statistics)
+
+            encoded = np.empty(len(dataframe), dtype=np.float64)
+            for fold, rows in enumerate(fold_rows):
+                out_of_fold_sums = sums - statistics[fold][position][0]
+                out_of_fold_counts = counts - statistics[fold][position][1]
+                prior = (target.sum() - target[rows].sum()) / max(len(dataframe) - len(rows), 1)
+                encoded[rows] = self._smooth(out_of_fold_sums, out_of_fold_counts, prior)[codes[rows, position]]
+
+            df_transformed[feature] = encoded
+            self.table_[feature] = dict(zip(uniques, self._smooth(sums, counts, self.prior_).tolist()))
+
+        logging.info("Target encoding completed.")
+        return df_transformed
+
+    def transform(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Encodes new data with the table fitted on all the rows, unseen categories get the prior.
+        """
+        if self.table_ is None:
+            raise CustomException("TargetEncoding has to be fitted before transform.", sys)
+
+        df_transformed = dataframe.copy() if self.copy else dataframe
+        for feature in self.features:
+            codes, uniques = self._factorize(dataframe[feature])
+            values = np.array([self.table_[feature].get(value, self.prior_) for value in uniques], dtype=np.float64)
+            df_transformed[feature] = values[codes]
+        return df_transformed
+
+    def encode_record(self, record: dict) -> dict:
+        """
+        Encodes a single record with one dictionary lookup per feature, for serving.
+        """
+        if self.table_ is None:
+            raise CustomException("TargetEncoding has to be fitted before encoding records.", sys)
+
+        encoded = dict(record)
+        for feature in self.features:
+            value = record.get(feature)
+            encoded[feature] = self.table_[feature].get(None if pd.isna(value) else value, self.prior_)
+        return encoded
+
+    def save(self, file_path: str) -> None:
+        """
+        Persists the category table and the prior as a small json artifact.
+        """
+        if self.table_ is None:
+            raise CustomException("TargetEncoding has to be fitted before it is saved.", sys)
+
+        with open(file_path, "w") as artifact_f:
+            json.dump({
+                "features": list(self.features),
+                "target": self.target,
+                "smoothing": self.smoothing,
+                "prior": self.prior_,
+                # pairs instead of an object, json object keys would turn every category into a string
+                "table": {feature: [[category, value] for category, value in table.items()]
+                          for feature, table in self.table_.items()},
+            }, artifact_f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "TargetEncoding":
+        with open(file_path) as artifact_f:
+            artifact = json.load(artifact_f)
+
+        strategy = cls(artifact["features"], target=artifact["target"], smoothing=artifact["smoothing"])
+        strategy.prior_ = artifact["prior"]
+        strategy.table_ = {feature: {category: value for category, value in pairs}
+                           for feature, pairs in artifact["table"].items()}
+        return strategy
+
+
+
+class FeatureEngineeringFactory:
+    STRATEGIES = {
+        "LogTransformation": LogTransformation,
+        "StandardScaling": StandardScaling,
+        "MinMaxScaling": MinMaxScaling,
+        "OneHotEncoding": OneHotEncoding,
+        "FeatureHashing": FeatureHashing,
+        "TargetEncoding": TargetEncoding,
+    }
+
+    @staticmethod
+    def get_strategy(strategy :str, features :list, **kwargs) -> FeatureEngineeringStrategy:
+        """
+        Returns the strategy of the given name for the features. Keyword arguments are passed on
+        to the constructor of the strategy, options it does not take are ignored.
+        """
+        if strategy not in FeatureEngineeringFactory.STRATEGIES:
+            raise CustomException(f"Unsupported feature engineering strategy: {strategy}", sys)
+
+        strategy_class = FeatureEngineeringFactory.STRATEGIES[strategy]
+        accepted = inspect.signature(strategy_class.__init__).parameters
+        ignored = [option for option in kwargs if option not in accepted]
+        if ignored:
+            logging.info(f"{strategy_class.__name__} ignores the options {ignored}")
+
+        return strategy_class(features, **{option: value for option, value in kwargs.items() if option in accepted})
+
+
+
+# This strategy applies an ordered chain of strategies with a single copy of the frame.
+class CompositeFeatureEngineering(FeatureEngineeringStrategy):
+    def __init__(self, specs, copy=True):
+        """
+        The specs are planned into waves: a step goes into the wave after the last one holding a
+        step that touches any of its columns (the features it reads and writes and the columns it
+        creates), so steps on the same columns keep their order and every wave is column-disjoint.
+        The frame is copied once, then every step writes into that single buffer, and the scalings
+        of a wave are fused into one multiply-add over their combined feature block.
+
+        Parameters:
+        specs (list): Ordered (strategy name, features) or (strategy name, features, options) specs,
+                      e.g. [("LogTransformation", ["SalePrice"]), ("StandardScaling", ["Lot Area"])].
+        copy (bool): If False, the caller gives up the input frame and even the single copy is saved.
+        """
+        self.copy = copy
+        self.steps = []
+        for spec in specs:
+            name, features, options = spec[0], list(spec[1]), dict(spec[2]) if len(spec) > 2 else {}
+            # every step works on the composite's own buffer
+            options["copy"] = False
+            self.steps.append(FeatureEngineeringFactory.get_strategy(name, features, **options))
+        self.waves = self.plan()
+
+    def plan(self) -> list:
+        """
+        Returns:
+        list: Waves of step positions, the steps of a wave have disjoint columns.
+        """
+        waves, step_waves = [], []
+        # A target encoding also reads its target, it must keep its order with the steps changing it.
+        # The encodings create columns too: FeatureHashing's are known upfront, OneHotEncoding's
+        # ("{feature}_{category}") only after the fit, so they are matched by their prefixes.
+        columns = [
+            (set(step.features) | {getattr(step, "target", None)} | set(getattr(step, "output_columns", []))) - {None}
+            for step in self.steps
+        ]
+        prefixes = [
+            tuple(f"{feature}_" for feature in step.features) if isinstance(step, OneHotEncoding) else ()
+            for step in self.steps
+        ]
+
+        def conflict(first: int, second: int) -> bool:
+            return bool(columns[first] & columns[second]) or any(
+                column.startswith(prefixes[first]) for column in columns[second]
+            ) or any(column.startswith(prefixes[second]) for column in columns[first])
+
+        for position, step in enumerate(self.steps):
+            wave = 0
+            for previous, previous_wave in enumerate(step_waves):
+                if conflict(position, previous):
+                    wave = max(wave, previous_wave + 1)
+            step_waves.append(wave)
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(position)
+        return waves
+
+    def apply_transformation(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+
+        logging.info(
+            f"Applying {len(self.steps)} feature engineering steps in {len(self.waves)} column-disjoint waves."
+        )
+        df_transformed = dataframe.copy() if self.copy else dataframe
+        for wave in self.waves:
+            scalings = [self.steps[position] for position in wave if isinstance(self.steps[position], AffineScaling)]
+            for position in wave:
+                if not isinstance(self.steps[position], AffineScaling):
+                    df_transformed = self.steps[position].apply_transformation(df_transformed)
+            if scalings:
+                df_transformed = self._scale(df_transformed, scalings)
+
+        logging.info("Composite feature engineering completed.")
+        return df_transformed
+
+    @staticmethod
+    def _scale(dataframe: pd.DataFrame, scalings: list) -> pd.DataFrame:
+        features = [feature for scaling in scalings for feature in scaling.features]
+        values = dataframe[features].to_numpy(dtype=np.float64, copy=True)
+        start = 0
+        for scaling in scalings:
+            # fitted on their slice of the block, the columns are read once
+            scaling._fit_values(values[:, start:start + len(scaling.features)])
+            start += len(scaling.features)
+
+        values *= np.concatenate([scaling.scale_ for scaling in scalings])
+        values += np.concatenate([scaling.offset_ for scaling in scalings])
+        dataframe[features] = values
+        return dataframe
+
+
+
 # Context Class for Feature Engineering
 
 class FeatureEngineer:
@@ -1,18 +1,64 @@
 from src.logger import logging
+from src.exception import CustomException
+from src.Components.missingness_mask import MissingnessMask
+from src.Components.streaming_statistics import StreamingStatistics, chunk_statistics
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import json
+import os
+import sys
+import numpy as np
 import pandas as pd
+from sklearn.linear_model import ElasticNet
+from sklearn.neighbors import NearestNeighbors
 
 
 
+def column_modes(df: pd.DataFrame) -> dict:
+    """
+    Computes the mode of every column in a single pass over the columns.
+
+    Categorical columns are counted straight from their codes, the others are hash-counted
+    through factorize, and a bincount over the codes gives every count at once, without the sort
+    Series.mode() does. Ties resolve to the smallest value, like Series.mode().
+    """
+    modes = {}
+
+    for column, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            # factorizing the bare ndarray skips the Series/Index wrapping of the uniques
+            codes, uniques = pd.factorize(series.to_numpy())
+
+        # shifted by one so the missing values (code -1) land in the first bin, which is dropped
+        counts = np.bincount(codes + 1, minlength=len(uniques) + 1)[1:]
+        if not len(counts) or not counts.max():
+            continue
+        candidates = uniques[counts == counts.max()]
+        try:
+            modes[column] = min(candidates)
+        except TypeError:
+            # values that can not be ordered, the first one seen wins
+            modes[column] = candidates[0]
+
+    return modes
+
+
 class MissingValueHandlingStrategy(ABC):
     @abstractmethod
-    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+        """
+        Handles the missing values of the frame. `mask` is the missingness mask built for this
+        frame at ingestion, without one the strategy finds the missing values itself.
+        """
         pass
 
 
 # Concrete Strategy for Dropping Missing Values
 class DropMissingValuesStrategy(MissingValueHandlingStrategy):
-    def __init__(self, axis=0, thresh=None):
+    def __init__(self, axis=0, thresh=None, max_null_rate=None, keep_columns=("SalePrice",)):
         """
         Initializes the DropMissingValuesStrategy with specific parameters.
 
@@ -20,14 +66,51 @@ class DropMissingValuesStrategy(MissingValueHandlingStrategy):
         axis (int): 0 to drop rows with missing values, 1 to drop columns with missing values.
         thresh (int): thresh specifies the minimum number of non-null values that a row (or column) 
                       must have in order to not be dropped.
+        max_null_rate (float): Planning mode, the columns with a larger share of missing values are
+                               dropped first, the rows are then judged on the remaining columns only.
+                               `plan_columns` makes the same decision from null rates known before
+                               ingestion, so those columns are never read.
+        keep_columns (tuple): Columns never dropped by the planning mode, such as the target.
         """
         self.axis = axis
         self.thresh = thresh
+        self.max_null_rate = max_null_rate
+        self.keep_columns = keep_columns
+
+    def plan_columns(self, null_rates: pd.Series) -> list:
+        """
+        Returns the columns to keep given their null rates, e.g. from `estimate_null_rates`.
+        """
+        if self.max_null_rate is None:
+            return list(null_rates.index)
+
+        keep = (null_rates <= self.max_null_rate) | null_rates.index.isin(list(self.keep_columns))
+        dropped = list(null_rates.index[~keep.to_numpy()])
+        if dropped:
+            logging.info(f"Planning to drop the columns with a null rate above {self.max_null_rate}: {dropped}")
+        return list(null_rates.index[keep.to_numpy()])
 
-    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
 
         logging.info(f"Dropping missing values with axis={self.axis} and thresh={self.thresh}")
-        df_cleaned = df.dropna(axis=self.axis, thresh=self.thresh)
+
+        # Same rules as df.dropna, decided from the missingness mask instead of a boolean frame.
+        mask = MissingnessMask.for_frame(df, mask)
+        if self.max_null_rate is not None:
+            columns = self.plan_columns(mask.counts() / max(len(df), 1))
+            df, mask = df[columns], mask.select(columns)
+
+        if self.axis in (0, "index"):
+            missing = mask.row_counts()
+            keep = missing == 0 if self.thresh is None else len(df.columns) - missing >= self.thresh
+            rows = np.flatnonzero(keep)
+            df_cleaned = df.iloc[rows]
+        else:
+            missing = mask.counts()
+            keep = missing == 0 if self.thresh is None else len(df) - missing >= self.thresh
+            columns = list(missing.index[keep.to_numpy()])
+            df_cleaned = df[columns]
+
         logging.info("Missing values dropped.")
         return df_cleaned
 
@@ -35,46 +118,678 @@ class DropMissingValuesStrategy(MissingValueHandlingStrategy):
 # Concrete Strategy for Filling Missing Values
 class FillMissingValuesStrategy(MissingValueHandlingStrategy):
 
-    def __init__(self, method="mean", fill_value=None):
+    def __init__(self, method="mean", fill_value=None, copy=True):
         """
         Initializes the FillMissingValuesStrategy with a specific method or fill value.
 
         Parameters:
         method (str): The method to fill missing values ('mean', 'median', 'mode', or 'constant').
         fill_value (any): The constant value to fill missing values when method='constant'.
+        copy (bool): If False, the caller gives up the input frame and its missing values are filled in place.
         """
         self.method = method
         self.fill_value = fill_value
+        self.copy = copy
+        self.fill_values_ = None
+
+    def fit(self, df: pd.DataFrame) -> "FillMissingValuesStrategy":
+        """
+        Computes the fill value of every column once, so they can be reused on any later frame.
+        """
+        if self.method in ("mean", "median"):
+            numeric_columns = df.select_dtypes(include="number").columns
+            statistics = getattr(df[numeric_columns], self.method)()
+            fill_values = statistics.dropna().to_dict()
+        elif self.method == "mode":
+            fill_values = column_modes(df)
+        elif self.method == "constant":
+            fill_values = {column: self.fill_value for column in df.columns}
+        else:
+            logging.warning(f"Unknown method '{self.method}'. No missing values handled.")
+            fill_values = {}
+
+        # Plain python values keep the artifact json serializable.
+        self.fill_values_ = {
+            column: value.item() if isinstance(value, np.generic) else value
+            for column, value in fill_values.items()
+        }
+        logging.info(f"Fitted fill values for {len(self.fill_values_)} columns using method: {self.method}")
+        return self
+
+    def fit_chunks(self, chunks, max_workers: int = None, sketch_size: int = 200,
+                   heavy_hitters: int = 100) -> "FillMissingValuesStrategy":
+        """
+        Computes the fill values from an iterable of chunks (e.g. ZipDataIngestor.iter_chunks)
+        without ever holding the whole dataset. The mean is exact, the median comes from a
+        quantile sketch and the mode from heavy-hitter counters (both exact on small columns).
+
+        Parameters:
+        chunks (iterable): DataFrames sharing the same columns.
+        max_workers (int): With several workers, the chunks are summarized in worker processes and the
+                           summaries are merged. Only 2 * max_workers chunks are in flight at once.
+        sketch_size (int): `k` of the quantile sketches used for the median.
+        heavy_hitters (int): Number of counters kept per column for the mode.
+        """
+        methods = (self.method,) if self.method in ("mean", "median", "mode") else ()
+        statistics = StreamingStatistics(methods, sketch_size=sketch_size, heavy_hitters=heavy_hitters)
+
+        if max_workers is None or max_workers <= 1:
+            for chunk in chunks:
+                statistics.update(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for chunk in chunks:
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            statistics.merge(future.result())
+                    pending.add(executor.submit(chunk_statistics, chunk, methods, sketch_size, heavy_hitters))
+                for future in pending:
+                    statistics.merge(future.result())
+
+        if methods:
+            fill_values = statistics.fill_values(self.method)
+        elif self.method == "constant":
+            fill_values = {column: self.fill_value for column in statistics.columns}
+        else:
+            logging.warning(f"Unknown method '{self.method}'. No missing values handled.")
+            fill_values = {}
+
+        self.fill_values_ = {
+            column: value.item() if isinstance(value, np.generic) else value
+            for column, value in fill_values.items()
+        }
+        logging.info(f"Fitted fill values for {len(self.fill_values_)} columns from chunks using method: {self.method}")
+        return self
+
+    def transform_chunks(self, chunks):
+        """
+        Yields every chunk with its missing values filled, for a second pass over the data.
+        """
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def transform(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+        """
+        Fills missing values with the fitted fill values in a single vectorized fillna.
+
+        Without a mask there is no scan for missing values beforehand: the fitted values are handed
+        to fillna as they are, columns of the frame without a fitted value are left untouched and
+        fitted columns the frame does not have are ignored. With the frame's ingestion mask only
+        the columns it marks as holding missing values go through fillna.
+        """
+        if self.fill_values_ is None:
+            raise CustomException("FillMissingValuesStrategy has to be fitted before transform.", sys)
+
+        fill_values = self.fill_values_
+        if mask is not None:
+            missing_columns = MissingnessMask.for_frame(df, mask).missing_columns()
+            fill_values = {column: fill_values[column] for column in missing_columns if column in fill_values}
+
+        if self.copy:
+            return df.fillna(value=fill_values)
+        df.fillna(value=fill_values, inplace=True)
+        return df
 
-    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
         """
         Fills missing values using the specified method or constant value.
 
         """
         logging.info(f"Filling missing values using method: {self.method}")
 
-        df_cleaned = df.copy()
-        if self.method == "mean":
-            numeric_columns = df_cleaned.select_dtypes(include="number").columns
-            df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
-                df[numeric_columns].mean()
+        df_cleaned = self.fit(df).transform(df, mask)
+
+        logging.info("Missing values filled.")
+        return df_cleaned
+
+    def save(self, file_path: str) -> None:
+        """
+        Persists the fitted fill values as a small json artifact.
+        """
+        if self.fill_values_ is None:
+            raise CustomException("FillMissingValuesStrategy has to be fitted before it is saved.", sys)
+
+        with open(file_path, "w") as artifact_f:
+            json.dump({"method": self.method, "fill_value": self.fill_value, "fill_values": self.fill_values_}, artifact_f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "FillMissingValuesStrategy":
+        with open(file_path) as artifact_f:
+            artifact = json.load(artifact_f)
+
+        strategy = cls(method=artifact["method"], fill_value=artifact["fill_value"])
+        strategy.fill_values_ = artifact["fill_values"]
+        return strategy
+
+
+# Concrete Strategy for Filling Missing Values with per-group statistics
+class GroupedFillMissingValuesStrategy(MissingValueHandlingStrategy):
+
+    def __init__(self, group_columns=("Neighborhood",), method="median", copy=True):
+        """
+        Initializes the GroupedFillMissingValuesStrategy, e.g. the median Lot Frontage per Neighborhood.
+
+        Parameters:
+        group_columns (tuple): Columns whose values define the groups.
+        method (str): The group statistic filling the numeric columns ('mean' or 'median').
+                      Rows whose group was not seen during fit, or whose group has no observed
+                      value, get the statistic over the whole frame.
+        copy (bool): If False, the caller gives up the input frame and its missing values are filled in place.
+        """
+        if method not in ("mean", "median"):
+            raise CustomException(f"Unsupported grouped fill method: {method}", sys)
+
+        self.group_columns = list(group_columns)
+        self.method = method
+        self.copy = copy
+        self.table_ = None
+        self.global_fill_values_ = None
+        self.lookup_ = None
+
+    def fit(self, df: pd.DataFrame) -> "GroupedFillMissingValuesStrategy":
+        """
+        Factorizes the group keys once and computes the statistics of every group and column in a
+        single groupby pass.
+        """
+        numeric_columns = [
+            column for column in df.select_dtypes(include="number").columns if column not in self.group_columns
+        ]
+
+        # rows with a missing key belong to no group, they only count towards the global statistics
+        complete = ~df[self.group_columns].isna().any(axis=1).to_numpy()
+        group_ids, group_keys = pd.MultiIndex.from_frame(df.loc[complete, self.group_columns]).factorize()
+
+        statistics = getattr(df.loc[complete, numeric_columns].groupby(group_ids), self.method)()
+        statistics.index = group_keys[statistics.index]
+        self.table_ = statistics
+
+        global_statistics = getattr(df[numeric_columns], self.method)().dropna()
+        self.global_fill_values_ = {
+            column: value.item() if isinstance(value, np.generic) else value
+            for column, value in global_statistics.items()
+        }
+        self.lookup_ = self._lookup(statistics)
+
+        logging.info(
+            f"Fitted {self.method} fill values for {len(self.table_)} groups of {self.group_columns} "
+            f"and {len(numeric_columns)} columns."
+        )
+        return self
+
+    @staticmethod
+    def _lookup(table: pd.DataFrame) -> dict:
+        """
+        Key-to-fill-values dictionary used to impute single records at serving time.
+        """
+        return {
+            tuple(value.item() if isinstance(value, np.generic) else value for value in key): {
+                column: value for column, value in zip(table.columns, row.tolist()) if not np.isnan(value)
+            }
+            for key, row in zip(table.index, table.to_numpy(dtype=np.float64))
+        }
+
+    def transform(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+        """
+        Fills the missing values of every row with the statistics of its group, vectorized.
+        """
+        if self.table_ is None:
+            raise CustomException("GroupedFillMissingValuesStrategy has to be fitted before transform.", sys)
+
+        positions = self.table_.index.get_indexer(pd.MultiIndex.from_frame(df[self.group_columns]))
+        group_values = self.table_.to_numpy(dtype=np.float64)[positions]
+        group_values[positions < 0] = np.nan
+
+        mask = MissingnessMask.for_frame(df, mask)
+        columns = [column for column in mask.missing_columns() if column in self.global_fill_values_]
+
+        df_cleaned = df.copy() if self.copy else df
+        for column in columns:
+            fill = group_values[:, self.table_.columns.get_loc(column)]
+            fill = np.where(np.isnan(fill), self.global_fill_values_[column], fill)
+            df_cleaned[column] = df[column].fillna(pd.Series(fill, index=df.index))
+        return df_cleaned
+
+    def fill_record(self, record: dict) -> dict:
+        """
+        Fills the missing values of a single record with one dictionary lookup, for serving.
+        """
+        if self.lookup_ is None:
+            raise CustomException("GroupedFillMissingValuesStrategy has to be fitted before filling records.", sys)
+
+        group_fill_values = self.lookup_.get(tuple(record.get(column) for column in self.group_columns), {})
+        filled = dict(record)
+        for column, global_value in self.global_fill_values_.items():
+            if pd.isna(filled.get(column)):
+                filled[column] = group_fill_values.get(column, global_value)
+        return filled
+
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+
+        logging.info(f"Filling missing values with the {self.method} per {self.group_columns}")
+        df_cleaned = self.fit(df).transform(df, mask)
+        logging.info("Missing values filled.")
+        return df_cleaned
+
+    def save(self, file_path: str) -> None:
+        """
+        Persists the lookup table and the global fallback as a small json artifact.
+        """
+        if self.lookup_ is None:
+            raise CustomException("GroupedFillMissingValuesStrategy has to be fitted before it is saved.", sys)
+
+        with open(file_path, "w") as artifact_f:
+            json.dump({
+                "group_columns": self.group_columns,
+                "method": self.method,
+                "global_fill_values": self.global_fill_values_,
+                "groups": [{"key": list(key), "fill_values": fill_values} for key, fill_values in self.lookup_.items()],
+            }, artifact_f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "GroupedFillMissingValuesStrategy":
+        with open(file_path) as artifact_f:
+            artifact = json.load(artifact_f)
+
+        strategy = cls(group_columns=artifact["group_columns"], method=artifact["method"])
+        strategy.global_fill_values_ = artifact["global_fill_values"]
+        strategy.lookup_ = {tuple(group["key"]): group["fill_values"] for group in artifact["groups"]}
+        strategy.table_ = pd.DataFrame.from_dict(strategy.lookup_, orient="index", dtype=np.float64).reindex(
+            columns=list(strategy.global_fill_values_)
+        )
+        strategy.table_.index = pd.MultiIndex.from_tuples(list(strategy.lookup_), names=strategy.group_columns)
+        return strategy
+
+
+# Concrete Strategy for imputing numeric columns from their nearest neighbours
+class KNNImputeStrategy(MissingValueHandlingStrategy):
+
+    def __init__(self, n_neighbors=5, feature_columns=None, exclude_columns=("Order", "PID"), target="SalePrice",
+                 block_size=10_000, max_workers=None, algorithm="auto", leaf_size=40, copy=True):
+        """
+        Initializes the KNNImputeStrategy.
+
+        The neighbours are searched in a spatial index (KD-tree or ball tree) over the standardized
+        numeric columns that have no missing values, so the imputation costs O(n log n) instead of
+        the O(n²) of a brute force imputer. Non numeric columns are left untouched.
+
+        Trees lose their edge in high dimensions: with algorithm='auto' more than 15 feature columns
+        fall back to blocked brute force distances, which BLAS computes faster there. Passing a few
+        informative `feature_columns` keeps the tree in use.
+
+        Parameters:
+        n_neighbors (int): Number of neighbours whose mean fills a missing value.
+        feature_columns (list): Columns the distances are computed on, by default every fully observed numeric column.
+        exclude_columns (tuple): Columns never used as features, such as ids.
+        target (str): The label column, never used as a feature: the neighbours would be picked by
+                      the label, which serving records do not have.
+        block_size (int): Number of rows queried at once. With at most two blocks per worker in flight,
+                          it caps the memory of the neighbour arrays.
+        max_workers (int): Number of threads the query blocks are spread over.
+        algorithm (str): 'kd_tree', 'ball_tree', 'brute' or 'auto', as in sklearn NearestNeighbors.
+        leaf_size (int): Leaf size of the trees.
+        copy (bool): If False, the caller gives up the input frame and the imputed values are written into it.
+        """
+        self.n_neighbors = n_neighbors
+        self.feature_columns = feature_columns
+        self.exclude_columns = exclude_columns
+        self.target = target
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.copy = copy
+
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+
+        numeric_columns = df.select_dtypes(include="number").columns
+        mask = MissingnessMask.for_frame(df, mask)
+        missing_counts = mask.counts()
+        target_columns = [column for column in numeric_columns if missing_counts[column]]
+
+        feature_columns = self.feature_columns
+        if feature_columns is None:
+            feature_columns = [
+                column for column in numeric_columns
+                if not missing_counts[column] and column not in self.exclude_columns and column != self.target
+            ]
+
+        elif self.target in feature_columns:
+            raise CustomException(f"The target {self.target} must not be a KNN feature column.", sys)
+        elif missing_counts[feature_columns].any():
+            raise CustomException("The KNN feature columns must not have missing values.", sys)
+
+        if not target_columns or not feature_columns:
+            logging.warning("No numeric column to impute or no fully observed feature column. No missing values handled.")
+            return df.copy() if self.copy else df
+
+        logging.info(
+            f"Imputing {len(target_columns)} columns from {self.n_neighbors} nearest neighbours "
+            f"over {len(feature_columns)} feature columns."
+        )
+        features = df[feature_columns].to_numpy(dtype=np.float64)
+        scale = features.std(axis=0)
+        features = (features - features.mean(axis=0)) / np.where(scale > 0, scale, 1.0)
+
+        # Columns missing on exactly the same rows (e.g. the garage columns) have the same mask bits
+        # and share their donors, one tree serves them all.
+        patterns = {}
+        for column in target_columns:
+            patterns.setdefault(mask.select([column]).bits.tobytes(), []).append(column)
+
+        df_cleaned = df.copy() if self.copy else df
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for columns in patterns.values():
+                self._impute(df_cleaned, features, mask.column(columns[0]), columns, executor)
+
+        logging.info("Missing values imputed.")
+        return df_cleaned
+
+    def _impute(self, df: pd.DataFrame, features: np.ndarray, missing: np.ndarray, columns: list, executor) -> None:
+        donors = np.flatnonzero(~missing)
+        if len(donors) == 0:
+            logging.warning(f"Columns {columns} have no observed value to impute from.")
+            return
+
+        n_neighbors = min(self.n_neighbors, len(donors))
+        index = NearestNeighbors(n_neighbors=n_neighbors, algorithm=self.algorithm, leaf_size=self.leaf_size)
+        index.fit(features[donors])
+        queries = np.flatnonzero(missing)
+
+        # The tree queries and the BLAS distances release the GIL, so the blocks run in parallel on the threads.
+        # A block is only submitted once one of the at most two blocks per worker in flight is reduced,
+        # so only their (block, k) neighbour positions are held, not a (queries, k) array.
+        donor_values = df[columns].to_numpy(dtype=np.float64)[donors]
+        max_in_flight = 2 * (self.max_workers or os.cpu_count() or 1)
+        in_flight, imputed_blocks = deque(), []
+        for start in range(0, len(queries), self.block_size):
+            if len(in_flight) == max_in_flight:
+                imputed_blocks.append(donor_values[in_flight.popleft().result()].mean(axis=1))
+            block = queries[start:start + self.block_size]
+            in_flight.append(executor.submit(index.kneighbors, features[block], return_distance=False))
+        while in_flight:
+            imputed_blocks.append(donor_values[in_flight.popleft().result()].mean(axis=1))
+        imputed = np.concatenate(imputed_blocks)
+
+        for position, column in enumerate(columns):
+            values = df[column].to_numpy(dtype=np.float64, copy=True)
+            values[queries] = imputed[:, position]
+            df[column] = values
+
+
+def fit_column_models(features: np.ndarray, targets: list, missing: list, warm_starts: list,
+                      alpha: float, l1_ratio: float) -> list:
+    """
+    Fits the regressor of every target column on all the other columns of the (already filled)
+    features and predicts the target's missing rows. Runs in the worker processes of
+    IterativeImputeStrategy, so it has to stay a module level function.
+
+    Parameters:
+    features (np.ndarray): Standardized feature matrix, the missing cells hold their current imputation.
+    targets (list): Positions of the target columns in `features`.
+    missing (list): Boolean missing rows of every target column.
+    warm_starts (list): (coef, intercept) of every target column's model from the previous round, or None.
+
+    Returns:
+    list: (coef, intercept, predictions for the missing rows) of every target column.
+    """
+    results = []
+    for target, target_missing, warm_start in zip(targets, missing, warm_starts):
+        others = np.delete(np.arange(features.shape[1]), target)
+        model = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, warm_start=True)
+        if warm_start is not None:
+            # coordinate descent starts from the previous round's solution instead of zeros
+            model.coef_, model.intercept_ = warm_start
+
+        model.fit(features[~target_missing][:, others], features[~target_missing, target])
+        predictions = model.predict(features[target_missing][:, others])
+        results.append((model.coef_, model.intercept_, predictions))
+    return results
+
+
+# Concrete Strategy for imputing numeric columns with regression models of the other columns
+class IterativeImputeStrategy(MissingValueHandlingStrategy):
+
+    def __init__(self, target_columns=None, exclude_columns=("Order", "PID"), target="SalePrice", max_iter=200,
+                 tol=1e-3, alpha=1e-3, l1_ratio=0.5, relaxation=0.5, max_workers=None, copy=True):
+        """
+        Initializes the IterativeImputeStrategy.
+
+        Every target column gets an ElasticNet regression on all the other numeric columns. The
+        missing cells start at the column means, then every round refits the models on the
+        previous round's imputations and replaces them with the new predictions. As every model of
+        a round only reads the previous round, the columns are fitted independently, spread over
+        `max_workers` processes, and each model is warm-started from its previous coefficients.
+        The rounds stop once no imputed value moved by more than `tol` standard deviations, a
+        warning is logged when `max_iter` rounds did not get there (Ames needs about 160).
+
+        Jacobi rounds oscillate on columns that determine each other exactly (Gr Liv Area is the sum
+        of the floor areas), so every round only moves the imputations by `relaxation` times the
+        way to the new predictions. The fixed point stays the same.
+
+        `handle` imputes the frame with `transform` after the fit, exactly as a fitted strategy
+        imputes new frames, so training and serving see the same imputations.
+
+        Parameters:
+        target_columns (list): Columns imputed by their model, by default every numeric column with missing values.
+                               The other columns are only predictors, their missing cells are left untouched.
+        exclude_columns (tuple): Columns never used as predictors, such as ids.
+        target (str): The label column, neither imputed nor used as a predictor: serving records
+                      do not have it.
+        max_iter (int): Maximum number of rounds.
+        tol (float): Largest change of an imputed value, in standard deviations, at which the rounds stop.
+        alpha (float): Regularization strength of the ElasticNet models, on standardized columns.
+        l1_ratio (float): Mix of the L1 and L2 penalties, the L1 part drops the useless predictors.
+        relaxation (float): Share of the step to the new predictions taken every round, 1 is plain Jacobi.
+        max_workers (int): Number of processes the column models of a round are fitted in.
+        copy (bool): If False, the caller gives up the input frame and the imputed values are written into it.
+        """
+        self.target_columns = target_columns
+        self.exclude_columns = exclude_columns
+        self.target = target
+        self.max_iter = max_iter
+        self.tol = tol
+        self.alpha = alpha
+        self.l1_ratio = l1_ratio
+        self.relaxation = relaxation
+        self.max_workers = max_workers
+        self.copy = copy
+        self.columns_ = None
+        self.means_ = None
+        self.models_ = None
+        self.n_iter_ = None
+
+    def fit(self, df: pd.DataFrame) -> "IterativeImputeStrategy":
+        self._fit(df, MissingnessMask.compute(df))
+        return self
+
+    def _fit(self, df: pd.DataFrame, mask: MissingnessMask) -> None:
+        columns = [
+            column for column in df.select_dtypes(include="number").columns
+            if column not in self.exclude_columns and column != self.target
+        ]
+        missing_counts = mask.counts()
+        target_columns = self.target_columns if self.target_columns is not None else columns
+        targets = [
+            position for position, column in enumerate(columns)
+            if column in target_columns and 0 < missing_counts[column] < len(df)
+        ]
+
+        values = df[columns].to_numpy(dtype=np.float64, copy=True)
+        missing = [mask.column(columns[target]) for target in targets]
+        means = np.nanmean(values, axis=0)
+        scales = np.nanstd(values, axis=0)
+        scales = np.where(scales > 0, scales, 1.0)
+
+        features = (values - means) / scales
+        features[np.isnan(features)] = 0.0
+
+        logging.info(f"Iteratively imputing {len(targets)} columns from {len(columns)} numeric columns.")
+        warm_starts = {target: None for target in targets}
+        n_iter = 0
+        change = 0.0
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers and self.max_workers > 1 else None
+        try:
+            for n_iter in range(1, self.max_iter + 1 if targets else 1):
+                results = self._round(features, targets, missing, warm_starts, executor)
+
+                # Jacobi update, every prediction of the round was made on the previous round's values
+                change = 0.0
+                for target, target_missing, (coef, intercept, predictions) in zip(targets, missing, results):
+                    step = self.relaxation * (predictions - features[target_missing, target])
+                    change = max(change, np.abs(step).max())
+                    features[target_missing, target] += step
+                    warm_starts[target] = (coef, intercept)
+
+                logging.info(f"Iterative imputation round {n_iter}, largest change {change:.6f}")
+                if change < self.tol:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if change >= self.tol:
+            logging.warning(
+                f"Iterative imputation did not converge in {self.max_iter} rounds (largest change {change:.6f}, "
+                f"tol {self.tol}), raise max_iter."
             )
-        elif self.method == "median":
-            numeric_columns = df_cleaned.select_dtypes(include="number").columns
-            df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
-                df[numeric_columns].median()
+
+        self.columns_ = columns
+        self.means_ = {column: float(mean) for column, mean in zip(columns, means) if not np.isnan(mean)}
+        self.n_iter_ = n_iter
+
+        # the models are kept in the original units with their zero coefficients dropped, for fill_record
+        self.models_ = {}
+        for target, (coef, intercept) in warm_starts.items():
+            others = np.delete(np.arange(len(columns)), target)
+            raw_coef = scales[target] * coef / scales[others]
+            self.models_[columns[target]] = {
+                "intercept": float(means[target] + scales[target] * intercept - raw_coef @ means[others]),
+                "coef": {columns[other]: float(value) for other, value in zip(others, raw_coef) if value},
+            }
+
+    def _round(self, features: np.ndarray, targets: list, missing: list, warm_starts: dict, executor) -> list:
+        if executor is None:
+            return fit_column_models(
+                features, targets, missing, [warm_starts[target] for target in targets], self.alpha, self.l1_ratio
             )
-        elif self.method == "mode":
-            for column in df_cleaned.columns:
-                df_cleaned[column].fillna(df[column].mode().iloc[0], inplace=True)
-        elif self.method == "constant":
-            df_cleaned = df_cleaned.fillna(self.fill_value)
+
+        # one task per worker, so the feature matrix is sent to each worker once per round
+        groups = np.array_split(np.arange(len(targets)), min(self.max_workers, len(targets)))
+        futures = [
+            executor.submit(
+                fit_column_models, features, [targets[i] for i in group], [missing[i] for i in group],
+                [warm_starts[targets[i]] for i in group], self.alpha, self.l1_ratio,
+            )
+            for group in groups if len(group)
+        ]
+        return [result for future in futures for result in future.result()]
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Imputes a new frame with the fitted models, running as many rounds as the fit needed.
+        """
+        if self.models_ is None:
+            raise CustomException("IterativeImputeStrategy has to be fitted before transform.", sys)
+
+        missing_counts = df[self.columns_].isna().sum()
+        targets = [column for column in self.models_ if missing_counts.get(column, 0)]
+
+        values = df[self.columns_].to_numpy(dtype=np.float64, copy=True)
+        missing = np.isnan(values)
+        values[missing] = np.take(np.array([self.means_.get(column, 0.0) for column in self.columns_]), np.nonzero(missing)[1])
+
+        positions = {column: position for position, column in enumerate(self.columns_)}
+        weights = np.zeros((len(self.columns_), len(targets)))
+        for position, column in enumerate(targets):
+            for other, value in self.models_[column]["coef"].items():
+                weights[positions[other], position] = value
+        intercepts = np.array([self.models_[column]["intercept"] for column in targets])
+        target_positions = [positions[column] for column in targets]
+
+        target_missing = missing[:, target_positions]
+        for _ in range(self.n_iter_ if targets else 0):
+            step = self.relaxation * (values @ weights + intercepts - values[:, target_positions])
+            values[:, target_positions] += np.where(target_missing, step, 0.0)
+
+        return self._write(df, targets, values[:, target_positions])
+
+    def _write(self, df: pd.DataFrame, targets: list, imputed: np.ndarray) -> pd.DataFrame:
+        df_cleaned = df.copy() if self.copy else df
+        for position, column in enumerate(targets):
+            df_cleaned[column] = imputed[:, position]
+        return df_cleaned
+
+    def fill_record(self, record: dict) -> dict:
+        """
+        Imputes a single record with the saved linear models, in plain python, for serving.
+        """
+        if self.models_ is None:
+            raise CustomException("IterativeImputeStrategy has to be fitted before filling records.", sys)
+
+        filled = dict(record)
+        targets = [column for column in self.models_ if pd.isna(filled.get(column))]
+        for column, mean in self.means_.items():
+            if pd.isna(filled.get(column)):
+                filled[column] = mean
+
+        # a single missing column is exact after one pass, several ones depend on each other
+        if len(targets) == 1:
+            rounds, relaxation = 1, 1.0
         else:
-            logging.warning(f"Unknown method '{self.method}'. No missing values handled.")
+            rounds, relaxation = self.n_iter_, self.relaxation
+        for _ in range(rounds):
+            predictions = {
+                column: self.models_[column]["intercept"] + sum(
+                    value * filled[other] for other, value in self.models_[column]["coef"].items()
+                )
+                for column in targets
+            }
+            for column, prediction in predictions.items():
+                filled[column] += relaxation * (prediction - filled[column])
 
-        logging.info("Missing values filled.")
+        for column, value in record.items():
+            if column not in targets and column in self.means_ and pd.isna(value):
+                # predictors without a model keep their missing value, like in handle
+                filled[column] = value
+        return filled
+
+    def handle(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
+
+        logging.info("Imputing missing values with iterative column models.")
+        self._fit(df, MissingnessMask.for_frame(df, mask))
+        df_cleaned = self.transform(df)
+        logging.info(f"Missing values imputed after {self.n_iter_} rounds.")
         return df_cleaned
 
+    def save(self, file_path: str) -> None:
+        """
+        Persists the fitted column models as a small json artifact.
+        """
+        if self.models_ is None:
+            raise CustomException("IterativeImputeStrategy has to be fitted before it is saved.", sys)
+
+        with open(file_path, "w") as artifact_f:
+            json.dump({
+                "columns": self.columns_,
+                "means": self.means_,
+                "n_iter": self.n_iter_,
+                "relaxation": self.relaxation,
+                "models": self.models_,
+            }, artifact_f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "IterativeImputeStrategy":
+        with open(file_path) as artifact_f:
+            artifact = json.load(artifact_f)
+
+        strategy = cls(relaxation=artifact["relaxation"])
+        strategy.columns_ = artifact["columns"]
+        strategy.means_ = artifact["means"]
+        strategy.n_iter_ = artifact["n_iter"]
+        strategy.models_ = artifact["models"]
+        return strategy
+
 
 # Context Class for Handling Missing Values
 class MissingValueHandler:
@@ -86,8 +801,8 @@ class MissingValueHandler:
         logging.info(f"Switching missing value handling strategy to {strategy}.")
         self._strategy = strategy
 
-    def handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
+    def handle_missing_values(self, df: pd.DataFrame, mask: MissingnessMask = None) -> pd.DataFrame:
         logging.info(f"Executing missing value handling strategy with {self._strategy}.")
-        return self._strategy.handle(df)
+        return self._strategy.handle(df, mask)
 
 
@@ -0,0 +1,114 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+
+"""
+Bit-packed missingness mask, one bit per cell (8x smaller than the boolean frame `isnull()`
+allocates), packed column by column so every column's bits are contiguous.
+
+The mask is computed once at ingestion and handed to the later stages as an artifact of its own,
+next to the frame, never stored in `df.attrs`: a mask kept there goes stale after any in-place
+edit of the frame, and pandas 2.0 does not write `attrs` to parquet. Code given a mask checks it
+against the frame's shape with `for_frame` and computes one itself when it is given none.
+"""
+
+# number of set bits of every byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class MissingnessMask:
+    def __init__(self, columns :list, n_rows :int, bits :np.ndarray):
+        """
+        Parameters:
+        columns (list): Column names, in the order of the rows of `bits`.
+        n_rows (int): Number of rows of the frame.
+        bits (np.ndarray): uint8 array of shape (len(columns), ceil(n_rows / 8)), bit set = missing.
+        """
+        self.columns = list(columns)
+        self._positions = {column: position for position, column in enumerate(self.columns)}
+        self.n_rows = n_rows
+        self.bits = bits
+
+    @classmethod
+    def compute(cls, df :pd.DataFrame) -> "MissingnessMask":
+        """
+        Scans the frame once, one column at a time so no full boolean frame is allocated.
+        """
+        bits = np.empty((len(df.columns), (len(df) + 7) // 8), dtype=np.uint8)
+        for position, (_, series) in enumerate(df.items()):
+            bits[position] = np.packbits(series.isna().to_numpy())
+        return cls(df.columns, len(df), bits)
+
+    @classmethod
+    def for_frame(cls, df :pd.DataFrame, mask :"MissingnessMask" = None) -> "MissingnessMask":
+        """
+        The mask handed along with the frame, restricted to the frame's columns, or a mask computed
+        from the frame when there is none. A mask of another row count or lacking a column of the
+        frame was built for another frame and is refused.
+        """
+        if mask is None:
+            return cls.compute(df)
+
+        missing_columns = [column for column in df.columns if column not in mask._positions]
+        if mask.n_rows != len(df) or missing_columns:
+            raise CustomException(
+                f"The missingness mask of {mask.n_rows} rows does not match the frame of {len(df)} rows"
+                f" (columns without bits: {missing_columns}).", sys
+            )
+        return mask.select(list(df.columns))
+
+    def save(self, file) -> None:
+        """
+        Writes the packed bits and the column names to a .npz file or file object.
+        """
+        np.savez(file, bits=self.bits, columns=np.array(self.columns, dtype=str), n_rows=np.int64(self.n_rows))
+
+    @classmethod
+    def load(cls, file) -> "MissingnessMask":
+        with np.load(file) as saved:
+            return cls(saved["columns"].tolist(), int(saved["n_rows"]), saved["bits"])
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def counts(self) -> pd.Series:
+        """
+        Number of missing values per column, read from the bits without unpacking them.
+        """
+        return pd.Series(_POPCOUNT[self.bits].sum(axis=1, dtype=np.int64), index=self.columns)
+
+    def missing_columns(self) -> list:
+        return [column for column, count in self.counts().items() if count]
+
+    def column(self, column) -> np.ndarray:
+        """
+        Boolean missingness of one column.
+        """
+        return np.unpackbits(self.bits[self._positions[column]], count=self.n_rows).astype(bool)
+
+    def row_counts(self) -> np.ndarray:
+        """
+        Number of missing values per row, accumulated column by column.
+        """
+        counts = np.zeros(self.n_rows, dtype=np.int32)
+        for bits in self.bits:
+            counts += np.unpackbits(bits, count=self.n_rows)
+        return counts
+
+    def to_frame(self, index :pd.Index = None) -> pd.DataFrame:
+        """
+        The full boolean frame, like `df.isnull()`, e.g. for a heatmap.
+        """
+        unpacked = np.unpackbits(self.bits, axis=1, count=self.n_rows).astype(bool)
+        return pd.DataFrame(unpacked.T, columns=self.columns, index=index)
+
+    def select(self, columns :list) -> "MissingnessMask":
+        positions = [self._positions[column] for column in columns]
+        if positions == list(range(len(self.columns))):
+            return self
+        return MissingnessMask(columns, self.n_rows, self.bits[positions])
@@ -2,11 +2,37 @@ from src.logger import logging
 from abc import ABC, abstractmethod
 from typing import Any
 
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.base import RegressorMixin
 from sklearn.linear_model import LinearRegression
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+
+def sparse_columns(X: pd.DataFrame) -> list:
+    return [column for column, dtype in X.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+
+
+def dataframe_to_csr(X: pd.DataFrame) -> sp.csr_matrix:
+    """
+    Stacks the columns of the frame into a CSR matrix in column order. Runs of sparse columns
+    (e.g. from OneHotEncoding(sparse=True)) are converted from their stored values only, runs of
+    dense columns are converted as a block.
+    """
+    is_sparse = [isinstance(dtype, pd.SparseDtype) for dtype in X.dtypes]
+    blocks, start = [], 0
+    for stop in range(1, len(is_sparse) + 1):
+        if stop == len(is_sparse) or is_sparse[stop] != is_sparse[start]:
+            run = X.iloc[:, start:stop]
+            if is_sparse[start]:
+                blocks.append(run.sparse.to_coo())
+            else:
+                blocks.append(sp.csr_matrix(run.to_numpy(dtype=np.float64)))
+            start = stop
+    return sp.hstack(blocks, format="csr", dtype=np.float64)
+
 
 
 class ModelBuildingStrategy(ABC):
@@ -47,12 +73,25 @@ class LinearRegressionStrategy(ModelBuildingStrategy):
         logging.info("Initializing Linear Regression model with scaling.")
 
         # Creating a pipeline with standard scaling and linear regression
-        pipeline = Pipeline(
-            [
-                ("scaler", StandardScaler()),  # Feature scaling
-                ("model", LinearRegression()),  # Linear regression model
-            ]
-        )
+        if sparse_columns(X_train):
+            # Sparse one-hot columns stay sparse: the frame becomes a CSR matrix inside the pipeline
+            # (so predict converts the same way) and the scaler must not center it. LinearRegression
+            # then solves with lsqr instead of the exact dense lstsq, the predictions differ slightly.
+            logging.info("Training on a CSR matrix for the sparse columns.")
+            pipeline = Pipeline(
+                [
+                    ("to_csr", FunctionTransformer(dataframe_to_csr, feature_names_out="one-to-one")),
+                    ("scaler", StandardScaler(with_mean=False)),
+                    ("model", LinearRegression()),
+                ]
+            )
+        else:
+            pipeline = Pipeline(
+                [
+                    ("scaler", StandardScaler()),  # Feature scaling
+                    ("model", LinearRegression()),  # Linear regression model
+                ]
+            )
 
         logging.info("Training Linear Regression model.")
         pipeline.fit(X_train, y_train)  # Fit the pipeline to the training data
@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+"""
+Mergeable running statistics for out-of-core imputation.
+
+Every summary is updated chunk by chunk and can be merged with a summary built on other chunks,
+e.g. in another worker process, giving the summary of all the chunks:
+- RunningMoments: count, mean and variance (Welford, merged with Chan's parallel formula).
+- QuantileSketch: KLL style compactor sketch for approximate quantiles such as the median.
+- HeavyHitters: Misra-Gries counters for the most frequent values, giving the mode.
+"""
+
+
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values :np.ndarray) -> "RunningMoments":
+        """
+        Adds the observed (non NaN) float values of one chunk.
+        """
+        if len(values) == 0:
+            return self
+
+        chunk = RunningMoments()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(np.square(values - chunk.mean).sum())
+        return self.merge(chunk)
+
+    def merge(self, other :"RunningMoments") -> "RunningMoments":
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def variance(self) -> float:
+        # sample variance, like pandas
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+
+class QuantileSketch:
+    def __init__(self, k :int = 200, seed :int = None):
+        """
+        Parameters:
+        k (int): Capacity of the top compactor, the rank error shrinks like 1/k. Up to `k` values
+                 the sketch holds every value and its quantiles are exact.
+        seed (int): Seed of the coin deciding which half of a compacted level is kept.
+        """
+        self.k = k
+        self.count = 0
+        # level i holds values standing for 2 ** i values each
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values :np.ndarray) -> "QuantileSketch":
+        """
+        Adds the observed (non NaN) float values of one chunk.
+        """
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other :"QuantileSketch") -> "QuantileSketch":
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _capacity(self, level :int) -> int:
+        # lower levels get geometrically smaller capacities, which keeps the sketch at O(k) values
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                values = np.sort(self.levels[level])
+                # with an odd number of values the largest one stays behind
+                kept = values[len(values) - len(values) % 2:]
+                promoted = values[self._rng.integers(2):len(values) - len(values) % 2:2]
+
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q :float) -> float:
+        if self.count == 0:
+            return float("nan")
+        if len(self.levels) == 1:
+            # nothing was compacted yet, the quantile is exact
+            return float(np.quantile(self.levels[0], q))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** i) for i, level in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(values[order][min(position, len(values) - 1)])
+
+
+class HeavyHitters:
+    def __init__(self, capacity :int = 100):
+        """
+        Parameters:
+        capacity (int): Number of counters kept. A count is underestimated by at most
+                        n / (capacity + 1), so with at most `capacity` distinct values the
+                        counts and the mode are exact.
+        """
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, values) -> "HeavyHitters":
+        """
+        Adds the observed values of one chunk (a Series or an array, missing values are skipped).
+        """
+        return self._add(self._reduce(pd.Series(values).value_counts(dropna=True)).items())
+
+    def merge(self, other :"HeavyHitters") -> "HeavyHitters":
+        return self._add(other.counts.items())
+
+    def _reduce(self, counts :pd.Series) -> pd.Series:
+        """
+        Misra-Gries decrement: subtracts the count of the first value beyond the capacity from
+        every counter and drops the counters that reach zero. `counts` is sorted descending.
+        """
+        if len(counts) <= self.capacity:
+            return counts
+        threshold = counts.iloc[self.capacity]
+        return counts[counts > threshold] - threshold
+
+    def _add(self, items) -> "HeavyHitters":
+        for value, count in items:
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+
+        if len(self.counts) > self.capacity:
+            counts = pd.Series(self.counts).sort_values(ascending=False, kind="stable")
+            self.counts = dict(self._reduce(counts).items())
+        return self
+
+    def mode(self):
+        """
+        The most frequent value, ties resolve to the smallest value like Series.mode().
+        Returns None when no value was seen.
+        """
+        if not self.counts:
+            return None
+
+        top = max(self.counts.values())
+        candidates = [value for value, count in self.counts.items() if count == top]
+        try:
+            return min(candidates)
+        except TypeError:
+            # values that can not be ordered, the first one seen wins
+            return candidates[0]
+
+
+class StreamingStatistics:
+    def __init__(self, methods :tuple = ("mean", "median", "mode"), sketch_size :int = 200,
+                 heavy_hitters :int = 100, seed :int = None):
+        """
+        Per-column summaries of a dataset read chunk by chunk.
+
+        Parameters:
+        methods (tuple): Statistics to keep, among 'mean', 'median' and 'mode'.
+        sketch_size (int): `k` of the quantile sketches.
+        heavy_hitters (int): Number of counters kept per column for the mode.
+        seed (int): Seed of the quantile sketches.
+        """
+        self.methods = tuple(methods)
+        self.sketch_size = sketch_size
+        self.heavy_hitters = heavy_hitters
+        self.seed = seed
+        self.columns = {}
+
+    def _column(self, column) -> dict:
+        if column not in self.columns:
+            self.columns[column] = {
+                "rows": 0,
+                "missing": 0,
+                # False as soon as a chunk holds observed values that are not numbers
+                "numeric": True,
+                "moments": RunningMoments() if "mean" in self.methods else None,
+                "sketch": QuantileSketch(self.sketch_size, self.seed) if "median" in self.methods else None,
+                "heavy_hitters": HeavyHitters(self.heavy_hitters) if "mode" in self.methods else None,
+            }
+        return self.columns[column]
+
+    def update(self, chunk :pd.DataFrame) -> "StreamingStatistics":
+        for column, series in chunk.items():
+            summary = self._column(column)
+            missing = series.isna()
+            n_missing = int(missing.sum())
+            summary["rows"] += len(series)
+            summary["missing"] += n_missing
+
+            if series.dtype.kind in "iuf":
+                values = series.to_numpy(dtype=np.float64)[~missing.to_numpy()]
+                if summary["moments"] is not None:
+                    summary["moments"].update(values)
+                if summary["sketch"] is not None:
+                    summary["sketch"].update(values)
+            elif n_missing < len(series):
+                summary["numeric"] = False
+
+            if summary["heavy_hitters"] is not None:
+                summary["heavy_hitters"].update(series)
+        return self
+
+    def merge(self, other :"StreamingStatistics") -> "StreamingStatistics":
+        for column, other_summary in other.columns.items():
+            if column not in self.columns:
+                self.columns[column] = other_summary
+                continue
+
+            summary = self.columns[column]
+            summary["rows"] += other_summary["rows"]
+            summary["missing"] += other_summary["missing"]
+            summary["numeric"] = summary["numeric"] and other_summary["numeric"]
+            for name in ("moments", "sketch", "heavy_hitters"):
+                if summary[name] is not None and other_summary[name] is not None:
+                    summary[name].merge(other_summary[name])
+        return self
+
+    def fill_values(self, method :str) -> dict:
+        """
+        Fill value of every column for 'mean', 'median' or 'mode', the columns without any
+        usable value are left out. Like the in-memory fit, mean and median only cover numeric columns.
+        Columns where no value is frequent enough to survive the heavy-hitter counters (e.g. ids)
+        have no mode.
+        """
+        if method not in self.methods:
+            raise ValueError(f"The statistics were not collected for method '{method}'.")
+
+        fill_values = {}
+        for column, summary in self.columns.items():
+            if method == "mean" and summary["numeric"] and summary["moments"].count:
+                fill_values[column] = summary["moments"].mean
+            elif method == "median" and summary["numeric"] and summary["sketch"].count:
+                fill_values[column] = summary["sketch"].quantile(0.5)
+            elif method == "mode" and summary["heavy_hitters"].counts:
+                fill_values[column] = summary["heavy_hitters"].mode()
+        return fill_values
+
+    @property
+    def missing_columns(self) -> list:
+        return [column for column, summary in self.columns.items() if summary["missing"]]
+
+
+def chunk_statistics(chunk :pd.DataFrame, methods :tuple, sketch_size :int = 200, heavy_hitters :int = 100) -> StreamingStatistics:
+    """
+    Summarizes one chunk, the unit of work sent to worker processes.
+    """
+    return StreamingStatistics(methods, sketch_size=sketch_size, heavy_hitters=heavy_hitters).update(chunk)
@@ -0,0 +1,156 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+"""
+Synthetic data generator for load and scale benchmarking.
+
+It learns the marginal distribution, the missingness rate and the category frequencies of every
+column of a reference dataset (e.g. AmesHousing.csv) and samples any number of rows from them,
+chunk by chunk, so memory stays constant whatever the number of rows.
+"""
+
+
+class SyntheticDataGenerator:
+    def __init__(self, n_quantiles :int = 1000, id_columns :tuple = ("Order", "PID")):
+        """
+        Parameters:
+        n_quantiles (int): Number of quantiles kept per numeric column to sample it by inverse transform.
+        id_columns (tuple): Columns generated as unique increasing ids instead of being sampled.
+        """
+        self.n_quantiles = n_quantiles
+        self.id_columns = id_columns
+        self.columns = None
+
+    def fit(self, df :pd.DataFrame):
+        """
+        Learns the per-column marginals of the reference DataFrame.
+        """
+        self.columns = {}
+        grid = np.linspace(0, 1, self.n_quantiles)
+
+        for column, series in df.items():
+            values = series.dropna()
+            spec = {"missing_rate": float(series.isna().mean())}
+
+            if column in self.id_columns and series.dtype.kind in "iu":
+                spec.update(kind="id", start=int(series.min()))
+            elif series.dtype.kind in "biuf":
+                numeric = values.to_numpy(dtype=np.float64)
+                spec.update(
+                    kind="numeric",
+                    quantiles=np.quantile(numeric, grid) if len(numeric) else np.zeros(len(grid)),
+                    integer=bool(len(numeric) and np.all(np.mod(numeric, 1) == 0)),
+                    dtype=series.dtype,
+                )
+            else:
+                frequencies = values.astype(str).value_counts(normalize=True)
+                spec.update(
+                    kind="categorical",
+                    categories=frequencies.index.to_numpy(dtype=object),
+                    probabilities=frequencies.to_numpy(),
+                )
+
+            self.columns[column] = spec
+
+        logging.info(f"Synthetic data generator fitted on {len(df)} rows and {len(df.columns)} columns.")
+        return self
+
+    def generate_chunks(self, n_rows :int, chunk_size :int = 100_000, seed :int = None):
+        """
+        Yields `n_rows` synthetic rows as DataFrames of at most `chunk_size` rows.
+        """
+        if self.columns is None:
+            raise CustomException("The generator has to be fitted before generating data.", sys)
+
+        rng = np.random.default_rng(seed)
+        grid = np.linspace(0, 1, self.n_quantiles)
+        n_rows = int(n_rows)
+
+        for offset in range(0, n_rows, chunk_size):
+            size = min(chunk_size, n_rows - offset)
+            chunk = {}
+
+            for column, spec in self.columns.items():
+                if spec["kind"] == "id":
+                    chunk[column] = np.arange(spec["start"] + offset, spec["start"] + offset + size, dtype=np.int64)
+                    continue
+
+                if spec["kind"] == "numeric":
+                    values = np.interp(rng.random(size), grid, spec["quantiles"])
+                    if spec["integer"]:
+                        values = np.round(values)
+                    if spec["missing_rate"] == 0 and spec["dtype"].kind in "iu":
+                        values = values.astype(spec["dtype"])
+                elif len(spec["categories"]):
+                    codes = rng.choice(len(spec["categories"]), size=size, p=spec["probabilities"])
+                    values = spec["categories"].take(codes)
+                else:
+                    values = np.full(size, np.nan, dtype=object)
+
+                if spec["missing_rate"] > 0:
+                    missing = rng.random(size) < spec["missing_rate"]
+                    values = values.astype(np.float64 if spec["kind"] == "numeric" else object)
+                    values[missing] = np.nan
+
+                chunk[column] = values
+
+            yield pd.DataFrame(chunk)
+
+    def write(self, file_path :str, n_rows :int, file_format :str = "csv", chunk_size :int = 100_000,
+              seed :int = None) -> str:
+        """
+        Writes `n_rows` synthetic rows to `file_path` chunk by chunk.
+
+        Parameters:
+        file_format (str): "csv", "parquet" or "json" (one record per line).
+        """
+        if file_format not in ("csv", "parquet", "json"):
+            raise ValueError(f"Unsupported file format {file_format}, choose 'csv', 'parquet' or 'json'.")
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        chunks = self.generate_chunks(n_rows, chunk_size=chunk_size, seed=seed)
+
+        if file_format == "parquet":
+            self._write_parquet(file_path, chunks)
+        else:
+            with open(file_path, "w", newline="") as out_f:
+                for position, chunk in enumerate(chunks):
+                    if file_format == "csv":
+                        chunk.to_csv(out_f, header=position == 0, index=False)
+                    else:
+                        out_f.write(chunk.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+
+        logging.info(f"Wrote {int(n_rows)} synthetic rows to {file_path}")
+        return file_path
+
+    def _write_parquet(self, file_path :str, chunks) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise CustomException(f"Writing parquet files requires pyarrow: {e}", sys)
+
+        # The schema comes from the fitted specs, inferring it from the first chunk breaks on
+        # columns that happen to be all missing in that chunk.
+        fields = []
+        for column, spec in self.columns.items():
+            if spec["kind"] == "id":
+                data_type = pa.int64()
+            elif spec["kind"] == "categorical":
+                data_type = pa.string()
+            elif spec["missing_rate"] == 0 and spec["dtype"].kind in "iu":
+                data_type = pa.from_numpy_dtype(spec["dtype"])
+            else:
+                data_type = pa.float64()
+            fields.append(pa.field(column, data_type))
+        schema = pa.schema(fields)
+
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
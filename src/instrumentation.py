@@ -0,0 +1,205 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from src.logger import logging
+
+"""
+Per-stage instrumentation.
+
+Every decorated stage records its wall time, CPU time, rows processed, throughput and peak RSS.
+The top tracemalloc allocators are recorded only when allocation tracing is enabled, with
+INSTRUMENT_TRACE_ALLOCATIONS=1 in the environment or on the decorator, since tracemalloc slows
+down every allocation of the stage. The records of one pipeline run are collected in a single
+JSON summary under artifacts/metrics/<run name>.json.
+"""
+
+METRICS_DIR = os.path.join("artifacts", "metrics")
+TRACE_ALLOCATIONS_ENV = "INSTRUMENT_TRACE_ALLOCATIONS"
+
+# Used when the stage runs outside of a ZenML pipeline run, e.g. in benchmarks.
+_PROCESS_RUN_NAME = f"run_{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{os.getpid()}"
+
+_summary_lock = threading.Lock()
+
+
+def _current_rss_bytes():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def _process_peak_rss_bytes():
+    """
+    High-water mark of the process RSS, used when psutil is not available to sample it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples the RSS in the background to find the peak of a single stage.
+    """
+
+    def __init__(self, interval :float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _current_rss_bytes() or 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, _current_rss_bytes())
+
+    def stop(self) -> int:
+        self._stopped.set()
+        self.join()
+        return max(self.peak, _current_rss_bytes())
+
+
+def _count_rows(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return max([_count_rows(item) for item in value] + [0])
+    return 0
+
+
+def _run_name() -> str:
+    try:
+        from zenml import get_step_context
+        return get_step_context().pipeline_run.name
+    except Exception:
+        return os.environ.get("PIPELINE_RUN_NAME", _PROCESS_RUN_NAME)
+
+
+def record_stage_metrics(record :dict, metrics_dir :str = METRICS_DIR) -> str:
+    """
+    Adds the stage record to the JSON summary of the current pipeline run and returns its path.
+    """
+    run_name = _run_name()
+    summary_path = os.path.join(metrics_dir, f"{run_name}.json")
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    with _summary_lock:
+        if os.path.exists(summary_path):
+            with open(summary_path) as summary_f:
+                summary = json.load(summary_f)
+        else:
+            summary = {"run": run_name, "stages": []}
+
+        summary["stages"].append(record)
+        summary["total_wall_seconds"] = sum(stage["wall_seconds"] for stage in summary["stages"])
+        summary["peak_rss_bytes"] = max((stage["peak_rss_bytes"] or 0) for stage in summary["stages"])
+
+        staging = f"{summary_path}.tmp"
+        with open(staging, "w") as summary_f:
+            json.dump(summary, summary_f, indent=2)
+        os.replace(staging, summary_path)
+
+    return summary_path
+
+
+def _trace_allocations_enabled() -> bool:
+    return os.environ.get(TRACE_ALLOCATIONS_ENV, "").lower() in ("1", "true", "yes")
+
+
+def instrument_stage(stage_name :str = None, trace_allocations :bool = None, top_allocations :int = 10):
+    """
+    Decorator recording the metrics of a pipeline stage. Put it below `@step`:
+
+        @step
+        @instrument_stage("data_ingestion_stage")
+        def data_ingestion_stage(...): ...
+
+    Parameters:
+    stage_name (str): Name used in the summary, defaults to the function name.
+    trace_allocations (bool): If True, tracemalloc records the top allocation sites of the stage.
+                              None leaves it to the INSTRUMENT_TRACE_ALLOCATIONS environment
+                              variable, read on every stage run, so it is off by default.
+    top_allocations (int): Number of allocation sites kept in the summary.
+    """
+    def decorator(func):
+        name = stage_name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracing = _trace_allocations_enabled() if trace_allocations is None else trace_allocations
+            started_tracing = tracing and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            if tracing:
+                tracemalloc.reset_peak()
+                before_snapshot = tracemalloc.take_snapshot()
+
+            sampler = _RssSampler() if _current_rss_bytes() is not None else None
+            if sampler is not None:
+                sampler.start()
+
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                if sampler is not None:
+                    sampler.stop()
+                if started_tracing:
+                    tracemalloc.stop()
+                raise
+
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            peak_rss = sampler.stop() if sampler is not None else _process_peak_rss_bytes()
+
+            inputs = list(args) + list(kwargs.values())
+            rows = _count_rows(inputs) or _count_rows(result)
+
+            record = {
+                "stage": name,
+                "wall_seconds": wall_seconds,
+                "cpu_seconds": cpu_seconds,
+                "rows": rows,
+                "rows_per_second": rows / wall_seconds if wall_seconds > 0 else None,
+                "peak_rss_bytes": peak_rss,
+            }
+
+            if tracing:
+                stats = tracemalloc.take_snapshot().compare_to(before_snapshot, "lineno")
+                record["python_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                record["allocation_count"] = sum(max(stat.count_diff, 0) for stat in stats)
+                record["top_allocations"] = [
+                    {
+                        "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "size_bytes": stat.size_diff,
+                        "count": stat.count_diff,
+                    }
+                    for stat in stats[:top_allocations]
+                ]
+                if started_tracing:
+                    tracemalloc.stop()
+
+            summary_path = record_stage_metrics(record)
+            logging.info(
+                f"Stage {name}: {wall_seconds:.3f}s wall, {cpu_seconds:.3f}s cpu, {rows} rows, "
+                f"peak RSS {peak_rss} bytes (summary in {summary_path})"
+            )
+            return result
+
+        return wrapper
+
+    return decorator
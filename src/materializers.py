@@ -0,0 +1,88 @@
+import io
+import json
+import os
+from typing import Any, Type
+
+import pandas as pd
+import scipy.sparse as sp
+from zenml.enums import ArtifactType
+from zenml.io import fileio
+from zenml.materializers.base_materializer import BaseMaterializer
+
+from src.Components.missingness_mask import MissingnessMask
+from src.Components.model_building import sparse_columns
+
+"""
+ZenML materializers of the artifacts the default materializers can not store as they are.
+Importing this module registers them for their types, except SparseFrameMaterializer, which is
+set on the step outputs that may hold sparse columns.
+"""
+
+MASK_FILENAME = "missingness_mask.npz"
+DENSE_FILENAME = "dense.parquet"
+SPARSE_FILENAME = "sparse.npz"
+LAYOUT_FILENAME = "layout.json"
+
+
+class MissingnessMaskMaterializer(BaseMaterializer):
+    """
+    Stores a MissingnessMask as its packed bits and column names, one bit per cell on disk too.
+    """
+
+    ASSOCIATED_TYPES = (MissingnessMask,)
+    ASSOCIATED_ARTIFACT_TYPE = ArtifactType.DATA
+
+    def load(self, data_type: Type[Any]) -> MissingnessMask:
+        with fileio.open(os.path.join(self.uri, MASK_FILENAME), "rb") as mask_f:
+            # np.load needs a seekable file, artifact store files are not always
+            return MissingnessMask.load(io.BytesIO(mask_f.read()))
+
+    def save(self, data: MissingnessMask) -> None:
+        buffer = io.BytesIO()
+        data.save(buffer)
+        with fileio.open(os.path.join(self.uri, MASK_FILENAME), "wb") as mask_f:
+            mask_f.write(buffer.getvalue())
+
+
+class SparseFrameMaterializer(BaseMaterializer):
+    """
+    Stores a DataFrame whose pandas sparse columns (e.g. from OneHotEncoding(sparse=True) or
+    FeatureHashing) parquet can not hold: the dense columns go to parquet with the index, the
+    sparse ones to a CSR matrix holding only their stored values, so they reach model building
+    sparse, where they are fitted as CSR. A frame without sparse columns is a plain parquet file.
+    Not registered for DataFrame, the steps set it with `output_materializers`.
+    """
+
+    ASSOCIATED_TYPES = (pd.DataFrame,)
+    ASSOCIATED_ARTIFACT_TYPE = ArtifactType.DATA
+    SKIP_REGISTRATION = True
+
+    def load(self, data_type: Type[Any]) -> pd.DataFrame:
+        with fileio.open(os.path.join(self.uri, LAYOUT_FILENAME), "r") as layout_f:
+            layout = json.load(layout_f)
+        with fileio.open(os.path.join(self.uri, DENSE_FILENAME), "rb") as dense_f:
+            dense = pd.read_parquet(io.BytesIO(dense_f.read()))
+        if not layout["sparse_columns"]:
+            return dense
+
+        with fileio.open(os.path.join(self.uri, SPARSE_FILENAME), "rb") as sparse_f:
+            matrix = sp.load_npz(io.BytesIO(sparse_f.read()))
+        sparse = pd.DataFrame.sparse.from_spmatrix(matrix, index=dense.index, columns=layout["sparse_columns"])
+        return pd.concat([dense, sparse], axis=1)[layout["columns"]]
+
+    def save(self, data: pd.DataFrame) -> None:
+        sparse_cols = sparse_columns(data)
+        with fileio.open(os.path.join(self.uri, LAYOUT_FILENAME), "w") as layout_f:
+            json.dump({"columns": list(data.columns), "sparse_columns": sparse_cols}, layout_f)
+
+        buffer = io.BytesIO()
+        data.drop(columns=sparse_cols).to_parquet(buffer)
+        with fileio.open(os.path.join(self.uri, DENSE_FILENAME), "wb") as dense_f:
+            dense_f.write(buffer.getvalue())
+        if not sparse_cols:
+            return
+
+        buffer = io.BytesIO()
+        sp.save_npz(buffer, data[sparse_cols].sparse.to_coo().tocsr())
+        with fileio.open(os.path.join(self.uri, SPARSE_FILENAME), "wb") as sparse_f:
+            sparse_f.write(buffer.getvalue())
@@ -1,35 +1,112 @@
+import os
 import pandas as pd
+from src.Components.data_ingestion import ZipDataIngestor
 from src.Components.handling_missing_values import (
     MissingValueHandler,
     DropMissingValuesStrategy,
-    FillMissingValuesStrategy
+    FillMissingValuesStrategy,
+    GroupedFillMissingValuesStrategy,
+    IterativeImputeStrategy,
+    KNNImputeStrategy
 )
+from src.Components.missingness_mask import MissingnessMask
+# registers the materializer that loads the mask input
+import src.materializers  # noqa: F401
 
 
 from src.exception import CustomException
 from src.logger import logging
+from src.instrumentation import instrument_stage
 import sys
 
 from zenml import step
 
 @step
-def handle_missing_values_stage(dataframe :pd.DataFrame, strategy :str = "mean") -> pd.DataFrame:
+@instrument_stage("handle_missing_values_stage")
+def handle_missing_values_stage(dataframe :pd.DataFrame, missingness_mask :MissingnessMask = None,
+                                strategy :str = "mean", fill_values_path :str = None,
+                                n_neighbors :int = 5, group_columns :list = None,
+                                max_null_rate :float = None, inplace :bool = False,
+                                max_workers :int = None, target_column :str = "SalePrice") -> pd.DataFrame:
 
-    """Handles missing values using MissingValueHandler and the specified strategy."""
+    """Handles missing values using MissingValueHandler and the specified strategy.
+
+    With `fill_values_path` the fitted fill values are saved there, so serving can apply
+    the same imputation without recomputing statistics. `strategy="knn"` imputes the numeric
+    columns from their `n_neighbors` nearest neighbours. `strategy="grouped_median"` (or
+    "grouped_mean") fills with the statistic per group of `group_columns`, Neighborhood by default.
+    `strategy="iterative"` imputes every numeric column with a regression on the others, fitted in
+    rounds over `max_workers` processes; its saved models impute single records at serving time.
+    With `strategy="drop"` and a `max_null_rate`, the columns above that null rate are dropped
+    before the rows are judged on the remaining ones.
+    With `inplace=True` the fill strategies write into the input frame instead of a copy. ZenML
+    materializes a fresh input for every step run, so the step owns it and nothing else sees it change.
+    `missingness_mask` is the mask artifact of the ingestion stage, the strategies read the missing
+    cells from it instead of scanning the frame.
+    `target_column` is never used to impute the features (knn, iterative), serving records have no label.
+    """
     if strategy == "drop":
-        handler = MissingValueHandler(DropMissingValuesStrategy(axis=0, thresh=5))
+        handler = MissingValueHandler(DropMissingValuesStrategy(axis=0, thresh=5, max_null_rate=max_null_rate))
 
     elif strategy in ["mean", "median", "constant", "mode"]:
-        handler = MissingValueHandler(FillMissingValuesStrategy(method=strategy))
+        fill_strategy = FillMissingValuesStrategy(method=strategy, copy=not inplace)
+        handler = MissingValueHandler(fill_strategy)
+
+    elif strategy in ["grouped_mean", "grouped_median"]:
+        fill_strategy = GroupedFillMissingValuesStrategy(
+            group_columns=group_columns or ["Neighborhood"], method=strategy.split("_", 1)[1], copy=not inplace
+        )
+        handler = MissingValueHandler(fill_strategy)
+
+    elif strategy == "knn":
+        handler = MissingValueHandler(KNNImputeStrategy(n_neighbors=n_neighbors, target=target_column, copy=not inplace))
+
+    elif strategy == "iterative":
+        fill_strategy = IterativeImputeStrategy(target=target_column, max_workers=max_workers, copy=not inplace)
+        handler = MissingValueHandler(fill_strategy)
 
     else:
         raise CustomException(f"Unsupported missing value handling strategy: {strategy}",sys)
     
     logging.info(f"Handling missing values using {strategy} strategy")
 
-    cleaned_df = handler.handle_missing_values(dataframe)
+    cleaned_df = handler.handle_missing_values(dataframe, missingness_mask)
+
+    if fill_values_path and strategy not in ["drop", "knn"]:
+        fill_strategy.save(fill_values_path)
+        logging.info(f"Saved fitted fill values to {fill_values_path}")
+
     return cleaned_df
 
 
+@step
+@instrument_stage("stream_missing_values_stage")
+def stream_missing_values_stage(file_path :str, output_path :str, strategy :str = "mean", chunk_size :int = 100_000,
+                                max_workers :int = None, fill_values_path :str = None) -> str:
+
+    """Imputes a zipped csv that does not fit in memory, in two chunked passes over the archive.
+
+    The first pass keeps running statistics (the median and mode are approximate on large
+    columns), summarized by `max_workers` processes; the second pass fills every chunk and appends
+    it to the csv at `output_path`, which is returned.
+    """
+    if strategy not in ["mean", "median", "constant", "mode"]:
+        raise CustomException(f"Unsupported streaming missing value handling strategy: {strategy}", sys)
+
+    ingestor = ZipDataIngestor(chunk_size=chunk_size)
+    fill_strategy = FillMissingValuesStrategy(method=strategy)
+
+    logging.info(f"Fitting {strategy} fill values on the chunks of {file_path}")
+    fill_strategy.fit_chunks(ingestor.iter_chunks(file_path), max_workers=max_workers)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", newline="") as output_f:
+        for position, chunk in enumerate(fill_strategy.transform_chunks(ingestor.iter_chunks(file_path))):
+            chunk.to_csv(output_f, header=position == 0, index=False)
+    logging.info(f"Wrote the imputed data to {output_path}")
 
+    if fill_values_path:
+        fill_strategy.save(fill_values_path)
+        logging.info(f"Saved fitted fill values to {fill_values_path}")
 
+    return output_path
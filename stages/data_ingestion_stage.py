@@ -1,27 +1,102 @@
+import os
+from typing import Annotated, Tuple
 import pandas as pd
 from zenml import step
 
 from src.logger import logging
-from src.Components.data_ingestion import DataIngestorFactory
+from src.instrumentation import instrument_stage
+from src.Components.data_ingestion import DataIngestorFactory, IncrementalDataIngestor, estimate_null_rates
+from src.Components.dataset_cache import DatasetCache
+from src.Components.dtype_plan import DtypePlan
+from src.Components.handling_missing_values import DropMissingValuesStrategy
+from src.Components.missingness_mask import MissingnessMask
+from src.materializers import MissingnessMaskMaterializer
 
 
 
+def default_history_path(incremental_index :str) -> str:
+    return f"{os.path.splitext(incremental_index)[0]}_history.parquet"
 
 
-@step
-def data_ingestion_stage(file_path :str) -> pd.DataFrame:
+@step(output_materializers={"missingness_mask": MissingnessMaskMaterializer})
+@instrument_stage("data_ingestion_stage")
+def data_ingestion_stage(file_path :str, stream :bool = False, chunk_size :int = 100_000,
+                         cache_dir :str = None, cache_max_bytes :int = 2 * 1024 ** 3,
+                         optimize_dtypes :bool = False, schema_path :str = "Model_Input_Schema.txt",
+                         max_workers :int = None, columns :list = None, row_filters :list = None,
+                         incremental_index :str = None, key_column :str = "PID", engine :str = "c",
+                         max_null_rate :float = None, incremental_history :str = None
+                         ) -> Tuple[Annotated[pd.DataFrame, "raw_data"], Annotated[MissingnessMask, "missingness_mask"]]:
       
-    """THis method will ingest data from a ZIP file using the appropriate DataIngestor."""
+    """THis method will ingest data from a ZIP file using the appropriate DataIngestor.
+
+    With `stream=True` the csv is parsed straight from the archive in chunks of `chunk_size` rows
+    instead of being extracted to disk first. With a `cache_dir` the parsed frame is cached in a
+    columnar format and memory mapped back on later runs while the archive is unchanged.
+    With `optimize_dtypes=True` the dtype plan built from `schema_path` narrows the numeric columns
+    and reads the strings as `category`. Directories and archives holding several csv shards are
+    parsed by `max_workers` processes. `columns` and `row_filters` ((column, operator, value) tuples)
+    are pushed down into the reader so only the needed data is decoded. With an `incremental_index`
+    only the rows that are new or changed since the last run (by `key_column`) are read as delta and
+    merged into the row history at `incremental_history` (by default next to the index), the merged
+    history is returned so the model is trained on every row, not on the delta alone. The index and
+    the history only record the delta once `commit_delta_index_stage` runs at the end of the pipeline.
+    The output depends on the index, so an incremental ingestion must run with the step cache disabled.
+    `engine="pyarrow"` parses the csv with the multithreaded Arrow reader instead of the pandas C parser.
+    With a `max_null_rate` the columns whose null rate is above it (known from parquet metadata,
+    the cache metadata or a sample, without a full scan) are dropped before parsing.
+    Next to the frame the step returns its bit-packed missingness mask, computed once here, as an
+    artifact of its own: the missing value stages and the analysis read the missing cells from it.
+    """
     
     logging.info(f"Starting data ingestion with file path {file_path}")
-    data_ingestor  = DataIngestorFactory.get_data_ingestor(file_path)
+    cache = DatasetCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    dtype_plan = DtypePlan.from_schema(schema_path) if optimize_dtypes else None
+
+    if max_null_rate is not None:
+        planned_columns = DropMissingValuesStrategy(max_null_rate=max_null_rate).plan_columns(
+            estimate_null_rates(file_path, cache=cache)
+        )
+        columns = planned_columns if columns is None else [column for column in columns if column in planned_columns]
+
+    data_ingestor  = DataIngestorFactory.get_data_ingestor(
+        file_path, stream=stream, chunk_size=chunk_size, cache=cache, dtype_plan=dtype_plan,
+        max_workers=max_workers, columns=columns, filters=row_filters, engine=engine,
+    )
+    if incremental_index:
+        data_ingestor = IncrementalDataIngestor(
+            data_ingestor, incremental_index, key_column=key_column,
+            history_path=incremental_history or default_history_path(incremental_index),
+        )
 
     output_ingestor :dict = data_ingestor.ingest(file_path)
 
     logging.info(f"Data ingestion completed successfully with extracted file path {output_ingestor['file_path']}")
 
+    if "memory_report" in output_ingestor:
+        logging.info(f"DataFrame memory report: {output_ingestor['memory_report']}")
+    if "delta_stats" in output_ingestor:
+        logging.info(f"Delta rows ingested: {output_ingestor['delta_stats']}")
+
     dataframe : pd.DataFrame = output_ingestor['dataframe']
 
-    return dataframe
+    mask = MissingnessMask.compute(dataframe)
+    logging.info(f"Built a missingness mask of {mask.nbytes} bytes for {int(mask.counts().sum())} missing cells")
+
+    return dataframe, mask
+
+
+
+@step(enable_cache=False)
+@instrument_stage("commit_delta_index_stage")
+def commit_delta_index_stage(incremental_index :str, incremental_history :str = None) -> None:
+
+    """Commits the delta index and the row history of an incremental ingestion.
 
+    Run it last, after the model was built: rows ingested by a run that fails before it are not
+    recorded as seen and are delivered again by the next run.
+    """
 
+    history_path = incremental_history or default_history_path(incremental_index)
+    if IncrementalDataIngestor.commit_pending(incremental_index, history_path):
+        logging.info(f"Delta index {incremental_index} and row history {history_path} committed")
@@ -1,15 +1,24 @@
-from typing import Tuple
+from typing import Annotated, Tuple
 import pandas as pd
 from src.Components.data_splitter import DataSplitter, SimpleTrainTestSplitStrategy
 from src.logger import logging
+from src.instrumentation import instrument_stage
+from src.materializers import SparseFrameMaterializer
 
 from zenml import step
 
 
-@step
-def data_splitting_stage(dataframe: pd.DataFrame, target_column :str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+@step(output_materializers={"X_train": SparseFrameMaterializer, "X_test": SparseFrameMaterializer})
+@instrument_stage("data_splitting_stage")
+def data_splitting_stage(dataframe: pd.DataFrame, target_column :str) -> Tuple[
+    Annotated[pd.DataFrame, "X_train"], Annotated[pd.DataFrame, "X_test"],
+    Annotated[pd.Series, "y_train"], Annotated[pd.Series, "y_test"]
+]:
     
-    """Splits the data into training and testing sets using DataSplitter and a chosen strategy."""
+    """Splits the data into training and testing sets using DataSplitter and a chosen strategy.
+
+    Sparse feature columns stay sparse in X_train and X_test, see SparseFrameMaterializer.
+    """
 
     splitter = DataSplitter(SimpleTrainTestSplitStrategy())
     logging.info("Starting data splitting stage...")
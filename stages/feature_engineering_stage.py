@@ -1,42 +1,124 @@
+from typing import Tuple
 import pandas as pd
 from src.Components.feature_engineering import (
+    AffineScaling,
+    CompositeFeatureEngineering,
     FeatureEngineer,
-    LogTransformation,
-    MinMaxScaling,
-    OneHotEncoding,
-    StandardScaling
+    FeatureEngineeringFactory,
+    TargetEncoding
 )
 from src.exception import CustomException
 from src.logger import logging
+from src.instrumentation import instrument_stage
+from src.materializers import SparseFrameMaterializer
 import sys
 
 from zenml import step
 
-@step
-def feature_engineering_stage(dataframe :pd.DataFrame, strategy :str = "StandardScaling", features :list = None) -> pd.DataFrame:
+@step(output_materializers=SparseFrameMaterializer)
+@instrument_stage("feature_engineering_stage")
+def feature_engineering_stage(dataframe :pd.DataFrame, strategy :str = "StandardScaling", features :list = None,
+                              inplace :bool = False, scaler_path :str = None,
+                              sparse :bool = False) -> pd.DataFrame:
+
+    """Applies the feature engineering `strategy` to `features`.
+
+    With `inplace=True` the strategy transforms the input frame instead of a copy. ZenML
+    materializes a fresh input for every step run, so the step owns it and nothing else sees it change.
+    With `scaler_path` the fitted scale and offset of StandardScaling or MinMaxScaling are saved
+    there, so serving applies the training scaling with `transform` instead of refitting.
+    TargetEncoding is refused here, it has to be fitted after the split, see `target_encoding_stage`.
+    With `sparse=True` OneHotEncoding and FeatureHashing build their columns sparse, which spares the
+    dense encoder output. They stay sparse across the step boundary (SparseFrameMaterializer stores
+    them as CSR), so model building fits them as a CSR matrix.
+    """
 
     if features is None:
         raise CustomException("No features were provided for feature engineering",sys)
+    if strategy == "TargetEncoding":
+        raise CustomException("TargetEncoding has to be fitted after the split, use target_encoding_stage", sys)
     
-    if strategy == "LogTransformation":
-        featureEngineer = FeatureEngineer(LogTransformation(features))
-    elif strategy == "OneHotEncoding":
-        featureEngineer = FeatureEngineer(OneHotEncoding(features))
-    elif strategy == "StandardScaling":
-        featureEngineer = FeatureEngineer(StandardScaling(features))
-    elif strategy == "MinMaxScaling":
-        featureEngineer = FeatureEngineer(MinMaxScaling(features))
-
-    else:
-        raise CustomException(f"Unsupported feature engineering strategy: {strategy}",sys)
-    
+    feature_strategy = FeatureEngineeringFactory.get_strategy(strategy, features, copy=not inplace, sparse=sparse)
+    featureEngineer = FeatureEngineer(feature_strategy)
 
     logging.info(f"Starting feature engineering with strategy : {strategy}")
     
 
     transformed_df = featureEngineer.apply_feature_engineering(dataframe)
 
+    if scaler_path and isinstance(feature_strategy, AffineScaling):
+        feature_strategy.save(scaler_path)
+        logging.info(f"Saved fitted scaler to {scaler_path}")
+
     logging.info(f"feature engineering completed successfully with strategy : {strategy}")
     
     return transformed_df
-    
\ No newline at end of file
+    
+
+
+@step(output_materializers=SparseFrameMaterializer)
+@instrument_stage("composite_feature_engineering_stage")
+def composite_feature_engineering_stage(dataframe :pd.DataFrame, specs :list = None, inplace :bool = False) -> pd.DataFrame:
+
+    """Applies an ordered chain of feature engineering strategies as a single step.
+
+    `specs` holds [strategy, features] pairs (optionally with a dict of strategy options as third
+    item), e.g. [["LogTransformation", ["Gr Liv Area", "SalePrice"]], ["StandardScaling", ["Lot Area"]]].
+    The chain costs one step, one artifact and at most one copy of the frame instead of one per
+    strategy, see CompositeFeatureEngineering. Sparse columns of the chain (FeatureHashing builds
+    them by default) leave the step sparse, see SparseFrameMaterializer.
+    """
+
+    if not specs:
+        raise CustomException("No feature engineering specs were provided",sys)
+
+    composite = CompositeFeatureEngineering(specs, copy=not inplace)
+    if any(isinstance(feature_strategy, TargetEncoding) for feature_strategy in composite.steps):
+        raise CustomException("TargetEncoding has to be fitted after the split, use target_encoding_stage", sys)
+    featureEngineer = FeatureEngineer(composite)
+
+    logging.info(f"Starting composite feature engineering with specs : {specs}")
+
+    transformed_df = featureEngineer.apply_feature_engineering(dataframe)
+
+    logging.info("composite feature engineering completed successfully")
+
+    return transformed_df
+
+
+
+@step(output_materializers=SparseFrameMaterializer)
+@instrument_stage("target_encoding_stage")
+def target_encoding_stage(X_train :pd.DataFrame, X_test :pd.DataFrame, y_train :pd.Series, features :list = None,
+                          n_splits :int = 5, smoothing :float = 10.0,
+                          encoding_path :str = None, max_workers :int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+
+    """Target encodes `features` after the split, so the hold-out target never reaches training.
+
+    The training rows are encoded out-of-fold from their own targets only, the test rows are
+    encoded with `transform` from the table fitted on the training rows. The out-of-fold tables
+    are computed in `max_workers` processes, serially by default.
+    With `encoding_path` the category table is saved there, for serving lookups.
+    """
+
+    if features is None:
+        raise CustomException("No features were provided for target encoding",sys)
+
+    target = y_train.name or "SalePrice"
+    # ZenML materializes fresh inputs for every step run, the step owns them
+    encoding = TargetEncoding(features, target=target, n_splits=n_splits, smoothing=smoothing,
+                              max_workers=max_workers, copy=False)
+
+    logging.info(f"Starting target encoding of {target} on {len(X_train)} training rows")
+
+    X_train[target] = y_train.to_numpy()
+    X_train = encoding.apply_transformation(X_train).drop(columns=[target])
+    X_test = encoding.transform(X_test)
+
+    if encoding_path:
+        encoding.save(encoding_path)
+        logging.info(f"Saved target encoding table to {encoding_path}")
+
+    logging.info("target encoding completed successfully")
+
+    return X_train, X_test
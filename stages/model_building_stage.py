@@ -1,4 +1,5 @@
 from src.exception import CustomException
+from src.instrumentation import instrument_stage
 import logging
 from typing import Annotated
 import sys
@@ -10,7 +11,9 @@ from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LinearRegression
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+from src.Components.model_building import dataframe_to_csr, sparse_columns
 
 from zenml import ArtifactConfig, step
 from zenml.client import Client
@@ -27,6 +30,7 @@ model = Model(
 
 
 @step(enable_cache=False, experiment_tracker=experiment_tracker.name, model=model)
+@instrument_stage("model_building_step")
 def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[Pipeline, ArtifactConfig(name="trained_pipeline")]:
     """
     Builds and trains a Linear Regression model using scikit-learn wrapped in a pipeline.
@@ -40,12 +44,14 @@ def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[
     if not isinstance(y_train, pd.Series):
         raise CustomException("y_train must be a pandas Series.",sys)
 
-    # Identify categorical and numerical columns
+    # Identify categorical, numerical and sparse (already one-hot encoded) columns
+    sparse_cols = sparse_columns(X_train)
     categorical_cols = X_train.select_dtypes(include=["object", "category"]).columns
-    numerical_cols = X_train.select_dtypes(exclude=["object", "category"]).columns
+    numerical_cols = X_train.select_dtypes(exclude=["object", "category"]).columns.drop(sparse_cols)
 
     logging.info(f"Categorical columns: {categorical_cols.tolist()}")
     logging.info(f"Numerical columns: {numerical_cols.tolist()}")
+    logging.info(f"Sparse columns: {len(sparse_cols)}")
 
     # Define preprocessing for categorical and numerical features
     numerical_transformer = SimpleImputer(strategy="mean")
@@ -56,16 +62,29 @@ def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[
         ]
     )
 
-    # Bundle preprocessing for numerical and categorical data
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("num", numerical_transformer, numerical_cols),
-            ("cat", categorical_transformer, categorical_cols),
-        ]
-    )
+    transformers = [
+        ("num", numerical_transformer, numerical_cols),
+        ("cat", categorical_transformer, categorical_cols),
+    ]
+    if sparse_cols:
+        # The imputer would densify the sparse columns, they go to the model as CSR instead.
+        transformers.append(
+            ("sparse", FunctionTransformer(dataframe_to_csr, feature_names_out="one-to-one"), sparse_cols)
+        )
+
+    # Bundle preprocessing for numerical and categorical data, kept sparse when there are sparse columns
+    preprocessor = ColumnTransformer(transformers=transformers, sparse_threshold=1.0 if sparse_cols else 0.3)
 
     # Define the model training pipeline
-    pipeline = Pipeline(steps=[("preprocessor", preprocessor), ("model", LinearRegression())])
+    if sparse_cols:
+        # LinearRegression solves sparse input iteratively (lsqr), which only converges on scaled columns.
+        # lsqr stops at its tolerance, so the predictions differ slightly (well below 0.5%) from the
+        # exact dense lstsq fit of the same columns; a sparse and a dense run are not bit-identical.
+        pipeline = Pipeline(steps=[
+            ("preprocessor", preprocessor), ("scaler", StandardScaler(with_mean=False)), ("model", LinearRegression())
+        ])
+    else:
+        pipeline = Pipeline(steps=[("preprocessor", preprocessor), ("model", LinearRegression())])
 
     # Start an MLflow run to log the model training process
     if not mlflow.active_run():
@@ -86,7 +105,7 @@ def model_building_step(X_train: pd.DataFrame, y_train: pd.Series) -> Annotated[
         onehot_encoder.fit(X_train[categorical_cols])
         expected_columns = numerical_cols.tolist() + list(
             onehot_encoder.get_feature_names_out(categorical_cols)
-        )
+        ) + sparse_cols
         logging.info(f"Model expects the following columns: {expected_columns}")
 
     except Exception as e: